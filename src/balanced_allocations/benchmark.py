@@ -0,0 +1,211 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from src.balanced_allocations.experiments import EXPERIMENT_REGISTRY
+from src.balanced_allocations.utils.recording import RecordingPolicy
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# --- Paths ---
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CONFIG = PROJECT_ROOT / "config" / "benchmark_balanced_allocations.yaml"
+RESULTS_DIR = PROJECT_ROOT / "results" / "balanced_allocations" / "benchmarks"
+
+
+def parse_args():
+    """
+    Parse CLI arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Balanced Allocations engines.")
+    parser.add_argument(
+        "--config", "-c",
+        type=str,
+        default=str(DEFAULT_CONFIG),
+        help="Path to YAML benchmark config file."
+    )
+    parser.add_argument(
+        "--output", "-o",
+        type=str,
+        help="Where to store the JSON results (default: results/balanced_allocations/benchmarks/<timestamp>.json)."
+    )
+    parser.add_argument(
+        "--baseline", "-b",
+        type=str,
+        help="JSON results of a previous run to compare against."
+    )
+    parser.add_argument(
+        "--tolerance", "-t",
+        type=float,
+        default=0.10,
+        help="Relative throughput drop against the baseline that counts as a regression."
+    )
+    return parser.parse_args()
+
+
+def load_config(path: str | Path):
+    """
+    Load YAML benchmark configuration file.
+    Expected format:
+      balls: 200000
+      repeats: 3
+      seed: 0
+      cases:
+        d_choice:
+          - num_bins: [100, 1000]
+            d: [2, 3]
+            batch_size: [1, 100]
+            bin_selection_mode: ["absolute", "partial_k2"]
+          - num_bins: [1000]
+            d: [2, 3]
+            batch_size: [1000]
+            engine: "vectorized"
+    Every list is one axis of a sweep; the cases are their cartesian product.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+
+    if "cases" not in cfg:
+        raise ValueError("YAML must contain a top-level 'cases' key.")
+    return cfg
+
+
+def expand_cases(cases: dict) -> list[tuple[str, dict]]:
+    """
+    Expand every experiment's axes into one (experiment, params) pair per point of the sweep.
+    """
+    expanded = []
+    for exp_name, sweeps in cases.items():
+        if exp_name not in EXPERIMENT_REGISTRY:
+            raise KeyError(f"Experiment '{exp_name}' not found in registry.")
+        if not isinstance(sweeps, list):
+            sweeps = [sweeps]
+        for axes in sweeps:
+            keys = list(axes)
+            values = [v if isinstance(v, list) else [v] for v in axes.values()]
+            for combination in itertools.product(*values):
+                expanded.append((exp_name, dict(zip(keys, combination))))
+    return expanded
+
+
+def case_key(exp_name: str, params: dict) -> str:
+    return exp_name + "(" + ", ".join(f"{k}={params[k]}" for k in sorted(params)) + ")"
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MB (None where it cannot be measured)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run_case(exp_name: str, params: dict, balls: int, repeats: int, seed: int) -> dict:
+    """
+    Time one case (best of `repeats` runs of `balls` balls). Runs in its own process,
+    so the peak RSS belongs to this case alone.
+    """
+    exp_cls = EXPERIMENT_REGISTRY[exp_name]
+    recording = RecordingPolicy("explicit", at=["m"], metrics_only=True)
+
+    timings = []
+    for _ in range(repeats):
+        exp = exp_cls(**params, seed=seed)
+        start = time.perf_counter()
+        exp.run(balls, recording)
+        timings.append(time.perf_counter() - start)
+
+    seconds = min(timings)
+    return {
+        "key": case_key(exp_name, params),
+        "experiment": exp_name,
+        "params": params,
+        "balls": balls,
+        "seconds": seconds,
+        "balls_per_sec": balls / seconds,
+        "ns_per_ball": seconds / balls * 1e9,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Print the throughput of every case against the baseline and return the keys of regressions.
+    """
+    baseline_cases = {case["key"]: case for case in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        base = baseline_cases.get(case["key"])
+        if base is None:
+            print(f"  new        {case['key']}")
+            continue
+        ratio = case["balls_per_sec"] / base["balls_per_sec"]
+        flag = "REGRESSION" if ratio < 1 - tolerance else "ok"
+        if flag == "REGRESSION":
+            regressions.append(case["key"])
+        print(f"  {flag:<10} {case['key']}: {ratio:.2f}x baseline throughput")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    config = load_config(args.config)
+
+    balls = config.get("balls", 100_000)
+    repeats = config.get("repeats", 3)
+    seed = config.get("seed", 0)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "balls": balls,
+            "repeats": repeats,
+            "seed": seed,
+        },
+        "cases": [],
+    }
+
+    for exp_name, params in expand_cases(config["cases"]):
+        # A fresh process per case keeps the peak RSS measurements independent
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            case = pool.submit(run_case, exp_name, params, balls, repeats, seed).result()
+        results["cases"].append(case)
+        rss = f"{case['peak_rss_mb']:.1f} MB" if case["peak_rss_mb"] is not None else "n/a"
+        print(f"{case['key']}: {case['balls_per_sec']:,.0f} balls/s, "
+              f"{case['ns_per_ball']:,.0f} ns/ball, peak RSS {rss}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to: {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Comparison against {args.baseline} (tolerance {args.tolerance:.0%}):")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
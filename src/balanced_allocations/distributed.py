@@ -0,0 +1,274 @@
+import base64
+import collections
+import json
+import multiprocessing
+import socket
+import socketserver
+import threading
+import time
+import traceback
+from typing import Callable, Iterator
+
+import numpy as np
+
+from balanced_allocations.models.history import RunHistory, SnapshotHistory
+from balanced_allocations.utils.instrumentation import RunStats
+from balanced_allocations.utils.recording import RecordingPolicy
+
+
+# --- Protocol ---
+# One JSON object per line in both directions. A worker connection says {"type": "ready"} and then
+# alternates between receiving {"type": "trial", ...} and answering {"type": "result", ...}, until
+# the coordinator answers {"type": "done"}. A trial that raises is answered {"type": "error", ...}
+# with the traceback instead. A connection holds at most one trial at a time, so a worker host runs
+# one connection per local process.
+
+def parse_address(address: str) -> tuple[str, int]:
+    """'host:port' as a (host, port) pair."""
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address '{address}'. Expected host:port.")
+    return host, int(port)
+
+
+def _pack(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+def _unpack(data: str, dtype) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=dtype)
+
+
+def trial_spec(t: int, exp_name: str, params: dict, recording: RecordingPolicy, seed: np.random.SeedSequence,
+               levels: bool = False, instrument: bool = False, dispatchers: dict | None = None) -> dict:
+    """Everything a worker needs to run trial t; the seed travels as its entropy and spawn key."""
+    recording_cfg = {k: (str(v) if k == "directory" and v is not None else v) for k, v in vars(recording).items()}
+    return {
+        "type": "trial",
+        "trial": t,
+        "experiment": exp_name,
+        "params": params,
+        "recording": recording_cfg,
+        "seed": {"entropy": seed.entropy, "spawn_key": list(seed.spawn_key)},
+        "levels": levels,
+        "instrument": instrument,
+        "dispatchers": dispatchers,
+    }
+
+
+def decode_trial(spec: dict) -> tuple:
+    """The run_trial arguments (exp_name, params, recording, seed, levels, instrument, dispatchers) of a trial spec."""
+    seed = np.random.SeedSequence(spec["seed"]["entropy"], spawn_key=tuple(spec["seed"]["spawn_key"]))
+    return (spec["experiment"], spec["params"], RecordingPolicy(**spec["recording"]), seed,
+            spec["levels"], spec["instrument"], spec["dispatchers"])
+
+
+def encode_result(spec: dict, history: RunHistory) -> dict:
+    """The gap metrics of a finished trial: checkpoints and gaps as raw int64 / float64 arrays."""
+    return {
+        "type": "result",
+        "batch": spec["batch"],
+        "trial": spec["trial"],
+        "ns": _pack(np.asarray(history.ns, dtype=np.int64)),
+        "gaps": _pack(np.asarray(history.gaps, dtype=np.float64)),
+        "stats": history.stats.as_dict() if history.stats is not None else None,
+    }
+
+
+def decode_result(result: dict, num_bins: int) -> RunHistory:
+    history = SnapshotHistory.from_gaps(num_bins, _unpack(result["ns"], np.int64).tolist(),
+                                        _unpack(result["gaps"], np.float64).tolist())
+    if result["stats"] is not None:
+        history.stats = RunStats()
+        history.stats.counters.update(result["stats"]["counters"])
+        history.stats.times.update(result["stats"]["seconds"])
+    return history
+
+
+def error_message(spec: dict) -> dict:
+    """The answer to a trial that raised, carrying the worker's traceback."""
+    return {"type": "error", "batch": spec["batch"], "trial": spec["trial"], "error": traceback.format_exc()}
+
+
+# --- Coordinator ---
+
+class TrialError(RuntimeError):
+    """A trial failed on a worker, or could not be run by any."""
+
+
+class TrialCoordinator:
+    """
+    Serves trial specs to workers over TCP and collects their results.
+
+    Trials are handed out first come, first served. A trial held by a connection that closes,
+    fails or (with `timeout`) stays silent for `timeout` seconds goes back to the front of the
+    queue, so a dead worker only costs the time of its trial; after `max_attempts` lost workers the
+    trial fails instead of taking the rest of the fleet down with it. A trial that raises on a worker
+    fails right away. TCP keepalive detects hosts that vanish without closing their connections, and
+    if no worker is connected for `worker_wait` seconds the batch fails rather than waiting forever.
+    """
+    def __init__(self, host: str, port: int, timeout: float | None = None, max_attempts: int = 3,
+                 worker_wait: float = 600.0):
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.worker_wait = worker_wait
+        self._cond = threading.Condition()
+        self._pending: collections.deque[dict] = collections.deque()
+        self._results: dict[int, dict] = {}
+        self._batch = 0
+        self._closing = False
+        self._connected = 0  # open worker connections
+        self._idle_since = time.monotonic()  # since when no worker is connected
+
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                coordinator._serve(self)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._server = Server((host, port), Handler)
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "TrialCoordinator":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def run(self, specs: list[dict]) -> Iterator[tuple[int, dict]]:
+        """
+        Queue the specs as a new batch right away and return an iterator of (trial, result) in the
+        order of the specs as results come in. Trials still queued when the caller stops iterating
+        are withdrawn, and late results of the batch are dropped.
+        """
+        with self._cond:
+            self._batch += 1
+            batch = self._batch
+            self._results.clear()
+            self._pending.extend(dict(spec, batch=batch, attempts=0) for spec in specs)
+            self._idle_since = time.monotonic()  # workers get the full grace period for every batch
+            self._cond.notify_all()
+        return self._collect(specs)
+
+    def _collect(self, specs: list[dict]) -> Iterator[tuple[int, dict]]:
+        try:
+            for spec in specs:
+                t = spec["trial"]
+                with self._cond:
+                    while t not in self._results:
+                        if not self._connected and time.monotonic() - self._idle_since > self.worker_wait:
+                            raise TrialError(f"No worker connected for {self.worker_wait:.0f} s; "
+                                             f"trial {t} and later trials were not run.")
+                        self._cond.wait(timeout=1.0)
+                    result = self._results.pop(t)
+                if result["type"] == "error":
+                    raise TrialError(f"Trial {t} failed:\n{result['error']}")
+                yield t, result
+        finally:
+            with self._cond:
+                self._pending.clear()
+                self._results.clear()
+                self._batch += 1  # in-flight trials of this batch now report into nothing
+
+    def _next_trial(self) -> dict | None:
+        """Block until a trial is queued (None once the coordinator closes)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or self._closing)
+            return None if self._closing else self._pending.popleft()
+
+    def _serve(self, handler: socketserver.StreamRequestHandler) -> None:
+        sock = handler.request
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        held = None
+        with self._cond:
+            self._connected += 1
+        try:
+            for line in handler.rfile:
+                message = json.loads(line)
+                if message["type"] in ("result", "error") and held is not None:
+                    with self._cond:
+                        if message["batch"] == self._batch:
+                            self._results[message["trial"]] = message
+                            self._cond.notify_all()
+                    held = None
+                sock.settimeout(None)  # a worker may wait for the next batch as long as it takes
+
+                held = self._next_trial()
+                if held is None:
+                    handler.wfile.write(b'{"type": "done"}\n')
+                    return
+                handler.wfile.write(json.dumps(held).encode() + b"\n")
+                sock.settimeout(self.timeout)
+        except (OSError, ValueError):
+            pass  # a broken connection or message: the worker is treated as dead
+        finally:
+            with self._cond:
+                self._connected -= 1
+                if not self._connected:
+                    self._idle_since = time.monotonic()
+                if held is not None and held["batch"] == self._batch:
+                    held["attempts"] += 1
+                    if held["attempts"] >= self.max_attempts:
+                        self._results[held["trial"]] = {
+                            "type": "error",
+                            "error": f"its worker was lost {held['attempts']} times (last: {handler.client_address}).",
+                        }
+                    else:
+                        self._pending.appendleft(held)
+                self._cond.notify_all()
+
+
+# --- Workers ---
+
+def run_worker(address: tuple[str, int], run: Callable[[dict], dict], processes: int = 1,
+               connect_seconds: float = 60.0) -> None:
+    """
+    Pull trials from the coordinator at `address` until it is done, in `processes` local processes
+    with one connection each. `run` turns a trial spec into its result message; a trial that raises
+    is reported to the coordinator and the worker moves on.
+    """
+    if processes <= 1:
+        _work(address, run, connect_seconds)
+        return
+    workers = [multiprocessing.Process(target=_work, args=(address, run, connect_seconds))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def _work(address: tuple[str, int], run: Callable[[dict], dict], connect_seconds: float) -> None:
+    deadline = time.monotonic() + connect_seconds
+    while True:
+        try:
+            sock = socket.create_connection(address)
+            break
+        except OSError:  # the coordinator may not be up yet
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(1.0)
+
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(b'{"type": "ready"}\n')
+        stream.flush()
+        for line in stream:
+            spec = json.loads(line)
+            if spec["type"] == "done":
+                return
+            try:
+                reply = run(spec)
+            except Exception:
+                reply = error_message(spec)
+            stream.write(json.dumps(reply).encode() + b"\n")
+            stream.flush()
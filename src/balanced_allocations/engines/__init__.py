@@ -0,0 +1,5 @@
+from .common_random import CommonRandomSimulator, PairedAggregator, PairedComparison, SharedStream
+from .level_histogram import LevelHistogramSimulator
+from .lockstep import LockstepSimulator
+from .multi_dispatcher import MultiDispatcherSimulator
+from .supermarket import StationaryLoads, SupermarketSimulator
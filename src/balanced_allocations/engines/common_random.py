@@ -0,0 +1,167 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from balanced_allocations.experiments.base_experiment import BaseExperiment
+from balanced_allocations.models.gap_summary import GapAggregator, GapSummary
+from balanced_allocations.utils.recording import RecordingPolicy
+from balanced_allocations.utils.seeding import Seed, seed_sequence, trial_seeds
+
+
+class SharedStream:
+    """
+    The random inputs of one trial, identical for every protocol that reads it: per ball,
+    `width` uniform candidates with a uniform tie-break key each, a β coin and a pick among
+    the first two candidates. Blocks are generated in the same order however the stream is
+    consumed, so every reader sees the same ball-by-ball draws.
+    """
+    def __init__(self, seed: Seed, num_bins: int, width: int, block_size: int = 1 << 14):
+        self._rng = np.random.default_rng(seed_sequence(seed))
+        self.num_bins = num_bins
+        self.width = width
+        self.block_size = block_size
+        self._fields: tuple[np.ndarray, ...] | None = None
+        self._pos = 0
+
+    def _block(self) -> tuple[np.ndarray, ...]:
+        size = self.block_size
+        return (
+            self._rng.integers(self.num_bins, size=(size, self.width)),
+            self._rng.random((size, self.width)),
+            self._rng.random(size),
+            self._rng.integers(2, size=size),
+        )
+
+    def take(self, size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(candidates, keys, coins, picks) of the next `size` balls."""
+        available = 0 if self._fields is None else len(self._fields[0]) - self._pos
+        if available < size:
+            parts = [] if self._fields is None else [tuple(field[self._pos:] for field in self._fields)]
+            while available < size:
+                parts.append(self._block())
+                available += self.block_size
+            self._fields = tuple(np.concatenate(columns) for columns in zip(*parts))
+            self._pos = 0
+        start = self._pos
+        self._pos += size
+        return tuple(field[start:self._pos] for field in self._fields)
+
+
+@dataclass
+class PairedComparison:
+    """Gap statistics of every variant and of its paired difference to the reference variant."""
+    reference: str
+    trials: int
+    summaries: dict[str, GapSummary]
+    differences: dict[str, GapSummary]  # variant - reference, per trial, for every other variant
+
+
+class CommonRandomSimulator:
+    """
+    Runs several protocols / selection modes on common random numbers: in every trial all
+    variants read the same SharedStream, so they see the same candidates, coins and tie-break
+    keys and differ only by their rule. Their gaps are compared trial by trial; the paired
+    differences have far less variance than differences of independent runs.
+    """
+    def __init__(self, variants: dict[str, BaseExperiment]):
+        if not variants:
+            raise ValueError("At least one variant is needed.")
+        sizes = {exp.num_bins for exp in variants.values()}
+        if len(sizes) != 1:
+            raise ValueError("All variants must have the same number of bins.")
+        if any(exp.weighted for exp in variants.values()):
+            raise ValueError("Common random numbers are only supported for unit balls and bins.")
+        if not all(exp.uniform_candidates for exp in variants.values()):
+            raise ValueError("Common random numbers share uniform candidates; every variant must draw them.")
+        self.variants = variants
+        self.num_bins = sizes.pop()
+        self.width = max(max(exp.choice_rule()[0], 2) for exp in variants.values())
+
+    def run_trial(self, balls_end: int, seed: Seed, recording: RecordingPolicy | None = None
+                  ) -> tuple[list[int], dict[str, list[float]]]:
+        """Run every variant once on the stream of `seed`; returns the checkpoints and each variant's gaps."""
+        recording = recording or RecordingPolicy(metrics_only=True)
+        if recording.format == "memmap":
+            raise ValueError("Paired comparisons only keep the gaps; use the 'snapshots' format.")
+        seed = seed_sequence(seed)
+        gaps = {}
+        ns: list[int] = []
+        for label, exp in self.variants.items():
+            # Every variant gets a fresh stream from the same seed, i.e. identical draws
+            stream = SharedStream(seed, self.num_bins, self.width)
+            history = self._run_variant(exp, stream, balls_end, recording)
+            ns, gaps[label] = history.ns, list(history.gaps)
+        return ns, gaps
+
+    def _run_variant(self, exp: BaseExperiment, stream: SharedStream, balls_end: int, recording: RecordingPolicy):
+        checkpoints = recording.checkpoints(self.num_bins, balls_end)
+        history = recording.new_history(self.num_bins, balls_end)
+        d, betta = exp.choice_rule()
+        bins, selector = exp.bins, exp.selector
+
+        balls_placed = 0
+        next_checkpoint = 0
+        while True:
+            if next_checkpoint is not None and balls_placed >= next_checkpoint:
+                history.record(balls_placed, bins)
+                next_checkpoint = checkpoints.next_after(balls_placed)
+
+            if balls_placed >= balls_end:
+                break
+
+            size = min(exp.batch_size, balls_end - balls_placed)
+            candidates, keys, coins, picks = stream.take(size)
+            if exp.engine == "vectorized":
+                choices = selector.choose_bins_keyed(candidates[:, :d], keys[:, :d])
+                if betta < 1:
+                    one_choice = candidates[np.arange(size), picks]
+                    choices = np.where(coins < betta, choices, one_choice)
+                bins.add_batch(np.bincount(choices, minlength=self.num_bins))
+            else:
+                choices = []
+                for row, row_keys, coin, pick in zip(candidates.tolist(), keys.tolist(),
+                                                     coins.tolist(), picks.tolist()):
+                    if coin < betta:
+                        choices.append(selector.choose_bin_keyed(row, row_keys, 0, d))
+                    else:
+                        choices.append(row[pick])
+                bins.add_balls(choices)
+            history.add_batch(choices)
+            balls_placed = bins.total_balls()
+
+        exp.reset()
+        return history
+
+    def run(self, balls_end: int, trials: int, seed: Seed = None,
+            recording: RecordingPolicy | None = None) -> PairedComparison:
+        """Run `trials` paired trials; the first variant is the reference of the differences."""
+        aggregator = PairedAggregator(self.num_bins, list(self.variants))
+        for trial_seed in trial_seeds(seed, trials):
+            aggregator.add_trial(*self.run_trial(balls_end, trial_seed, recording))
+        return aggregator.summary()
+
+
+class PairedAggregator:
+    """Streams the per-trial gaps of all variants into per-variant and paired-difference statistics."""
+    def __init__(self, num_bins: int, labels: list[str]):
+        self.labels = labels
+        self.reference = labels[0]
+        self.trials = 0
+        self._gaps = {label: GapAggregator(num_bins) for label in labels}
+        self._differences = {label: GapAggregator(num_bins) for label in labels[1:]}
+
+    def add_trial(self, ns: list[int], gaps: dict[str, list[float]]) -> None:
+        reference = np.asarray(gaps[self.reference])
+        for label in self.labels:
+            self._gaps[label].add_trial(ns, gaps[label])
+            if label != self.reference:
+                self._differences[label].add_trial(ns, np.asarray(gaps[label]) - reference)
+        self.trials += 1
+
+    def summary(self) -> PairedComparison:
+        return PairedComparison(
+            reference=self.reference,
+            trials=self.trials,
+            summaries={label: aggregator.summary() for label, aggregator in self._gaps.items()},
+            differences={label: aggregator.summary() for label, aggregator in self._differences.items()},
+        )
@@ -0,0 +1,64 @@
+from balanced_allocations.experiments.base_experiment import BaseExperiment
+from balanced_allocations.models.history import RunHistory
+from balanced_allocations.models.load_levels import LoadLevels
+from balanced_allocations.utils.bin_selector import BinSelector
+from balanced_allocations.utils.recording import RecordingPolicy
+
+
+class LevelHistogramSimulator:
+    """
+    Runs one trial of an experiment on a LoadLevels state instead of an m-sized load array.
+
+    Candidates are uniform, so a candidate is a uniform rank into the sorted loads, and the
+    experiment's own step / step_batch choose among ranks exactly as they choose among bins.
+    Each ball costs O(log levels) to look up its candidates' loads and O(levels) at most to
+    move the winner, so m = 10^6 - 10^7 bins only cost memory for the gap-wide band of levels.
+    The recorded gaps follow the same distribution as a run on Bins.
+    """
+    def __init__(self, experiment: BaseExperiment):
+        self.experiment = experiment
+
+    def run(self, balls_end: int, recording: RecordingPolicy | None = None) -> RunHistory:
+        recording = recording or RecordingPolicy(metrics_only=True)
+        if recording.format == "events":
+            raise ValueError("The level histogram engine has no bin identities to log; "
+                             "use the 'snapshots' or 'memmap' format.")
+
+        exp = self.experiment
+        if exp.weighted:
+            raise ValueError("Bins with capacities or weighted balls are not exchangeable; run them on Bins.")
+        if not exp.uniform_candidates:
+            raise ValueError("Bins are only exchangeable under uniform candidates; run this experiment on Bins.")
+        num_bins = exp.num_bins
+        checkpoints = recording.checkpoints(num_bins, balls_end)
+        history = recording.new_history(num_bins, balls_end)
+
+        # The experiment's per-bin Bins are never built: the levels stand in for them
+        levels = LoadLevels(num_bins)
+        exp.bins = levels
+        exp.selector = BinSelector(levels, exp.bin_selection_mode, exp.random)
+
+        balls_placed = 0
+        next_checkpoint = 0
+
+        while True:
+            if next_checkpoint is not None and balls_placed >= next_checkpoint:
+                history.record(balls_placed, levels)
+                next_checkpoint = checkpoints.next_after(balls_placed)
+
+            if balls_placed >= balls_end:
+                break
+
+            # Every rank of a batch refers to the sorted loads at the start of the batch
+            current_batch_size = min(exp.batch_size, balls_end - balls_placed)
+            if exp.engine == "vectorized":
+                levels.add_balls(exp.step_batch(current_batch_size))
+            elif current_batch_size == 1:
+                levels.add_ball(exp.step())
+            else:
+                levels.add_balls([exp.step() for _ in range(current_batch_size)])
+
+            balls_placed = levels.total_balls()
+
+        exp.reset()
+        return history
@@ -0,0 +1,58 @@
+import numpy as np
+
+from balanced_allocations.experiments.base_experiment import BaseExperiment
+from balanced_allocations.models.bins_matrix import BinsMatrix
+from balanced_allocations.models.gap_summary import GapAggregator, GapSummary
+from balanced_allocations.utils.bin_selector import BinSelector
+from balanced_allocations.utils.recording import RecordingPolicy
+
+
+class LockstepSimulator:
+    """
+    Runs T trials of an experiment together: the loads of all trials live in one (T, m)
+    matrix and every batch is placed in all trials at once by the experiment's step_batch.
+    Only the gaps are recorded, streamed into a GapAggregator at every checkpoint (the
+    distributions of the trials are never copied).
+    """
+    def __init__(self, experiment: BaseExperiment, trials: int):
+        self.experiment = experiment
+        self.trials = trials
+
+    def run(self, balls_end: int, recording: RecordingPolicy | None = None) -> GapSummary:
+        recording = recording or RecordingPolicy(metrics_only=True)
+        if recording.format != "snapshots":
+            raise ValueError(f"Lockstep runs only record the gaps; the '{recording.format}' format is not "
+                             "available, use 'snapshots'.")
+        exp = self.experiment
+        if exp.weighted:
+            raise ValueError("Lockstep runs only support unit balls and bins; run weighted experiments per trial.")
+        num_bins = exp.num_bins
+        checkpoints = recording.checkpoints(num_bins, balls_end)
+
+        bins = BinsMatrix(self.trials, num_bins)
+        exp.bins = bins
+        exp.selector = BinSelector(bins, exp.bin_selection_mode)
+
+        aggregator = GapAggregator(num_bins)
+        offsets = np.arange(self.trials)[:, None] * num_bins  # row offsets into the flattened matrix
+
+        balls_placed = 0
+        next_checkpoint = 0
+
+        while True:
+            if next_checkpoint is not None and balls_placed >= next_checkpoint:
+                aggregator.add_samples(balls_placed, bins.gaps())
+                next_checkpoint = checkpoints.next_after(balls_placed)
+
+            if balls_placed >= balls_end:
+                break
+
+            current_batch_size = min(exp.batch_size, balls_end - balls_placed)
+            choices = exp.step_batch(current_batch_size, self.trials)
+            batch_loads = np.bincount((choices + offsets).ravel(), minlength=self.trials * num_bins)
+            bins.add_batch(batch_loads.reshape(self.trials, num_bins))
+
+            balls_placed = bins.total_balls()
+
+        exp.reset()
+        return aggregator.summary()
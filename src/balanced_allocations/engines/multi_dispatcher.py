@@ -0,0 +1,117 @@
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from balanced_allocations.experiments.base_experiment import BaseExperiment
+from balanced_allocations.models.bins import Bins
+from balanced_allocations.models.history import RunHistory
+from balanced_allocations.utils.bin_selector import BinSelector
+from balanced_allocations.utils.recording import RecordingPolicy
+
+
+class MultiDispatcherSimulator:
+    """
+    Stale information with D dispatchers: the balls are shared out among the dispatchers (in turn,
+    or each to a uniformly random one), and every dispatcher places its balls with the experiment's
+    rule (d, β) against its own snapshot of the loads, refreshed every refresh[i] balls. Refreshes
+    are staggered: dispatcher i > 0 first refreshes after i * refresh[i] / D balls, dispatcher 0
+    after a full period.
+
+    A dispatcher's choices only depend on its snapshot, so between two refreshes (of any
+    dispatcher) or checkpoints the balls of each dispatcher form one batch, placed with vectorized
+    selection. Every dispatcher draws from its own random stream, so with `workers` > 1 the
+    dispatchers run in parallel threads that commit their batch loads into the shared bins,
+    with the same result as a sequential run.
+    """
+    ASSIGNMENTS = ("round_robin", "random")
+
+    def __init__(self, experiment: BaseExperiment, count: int, refresh: int | list[int],
+                 assignment: str = "round_robin", workers: int = 1):
+        if count <= 0:
+            raise ValueError("The number of dispatchers must be positive.")
+        refresh = list(refresh) if isinstance(refresh, (list, tuple)) else [refresh] * count
+        if len(refresh) != count or any(r <= 0 for r in refresh):
+            raise ValueError("refresh must be a positive number of balls, or one per dispatcher.")
+        if assignment not in self.ASSIGNMENTS:
+            raise ValueError(f"Invalid assignment '{assignment}'. Expected one of {self.ASSIGNMENTS}.")
+        if experiment.weighted or not experiment.uniform_candidates:
+            raise ValueError("Dispatchers draw uniform candidates for unit balls and bins.")
+        self.experiment = experiment
+        self.count = count
+        self.refresh = refresh
+        self.assignment = assignment
+        self.workers = workers
+
+    def run(self, balls_end: int, recording: RecordingPolicy | None = None) -> RunHistory:
+        recording = recording or RecordingPolicy(metrics_only=True)
+        if recording.format == "events":
+            raise ValueError("Dispatchers place their balls concurrently; use the 'snapshots' or 'memmap' format.")
+        exp = self.experiment
+        bins: Bins = exp.bins
+        num_bins = len(bins)
+        d, betta = exp.choice_rule()
+        checkpoints = recording.checkpoints(num_bins, balls_end)
+        history = recording.new_history(num_bins, balls_end)
+
+        # Each dispatcher has its own stream, derived from the experiment's, and its own view
+        assign_rng, *rngs = exp.rng.spawn(self.count + 1)
+        views = [copy.deepcopy(bins) for _ in range(self.count)]
+        selectors = [BinSelector(view, exp.bin_selection_mode, exp.random) for view in views]
+        next_refresh = [i * r // self.count or r for i, r in enumerate(self.refresh)]
+        commit_lock = threading.Lock()
+
+        def dispatch(i: int, size: int) -> None:
+            rng = rngs[i]
+            candidates = rng.integers(num_bins, size=(size, max(d, 2)))
+            choices = selectors[i].choose_bins(candidates[:, :d], rng)
+            if betta < 1:
+                one_choice = candidates[np.arange(size), rng.integers(2, size=size)]
+                choices = np.where(rng.random(size) < betta, choices, one_choice)
+            loads = np.bincount(choices, minlength=num_bins)
+            with commit_lock:
+                bins.add_batch(loads)
+
+        pool = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        balls_placed = 0
+        next_checkpoint = 0
+        try:
+            while True:
+                if next_checkpoint is not None and balls_placed >= next_checkpoint:
+                    history.record(balls_placed, bins)
+                    next_checkpoint = checkpoints.next_after(balls_placed)
+
+                if balls_placed >= balls_end:
+                    break
+
+                stop = min(balls_end, min(next_refresh), next_checkpoint or balls_end)
+                shares = self._shares(balls_placed, stop, assign_rng)
+                jobs = [(i, size) for i, size in enumerate(shares) if size]
+                if pool is None:
+                    for job in jobs:
+                        dispatch(*job)
+                else:
+                    for future in [pool.submit(dispatch, *job) for job in jobs]:
+                        future.result()
+                balls_placed = stop
+
+                for i in range(self.count):
+                    if next_refresh[i] <= balls_placed:
+                        views[i] = copy.deepcopy(bins)
+                        selectors[i] = BinSelector(views[i], exp.bin_selection_mode, exp.random)
+                        next_refresh[i] += self.refresh[i]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        exp.reset()
+        return history
+
+    def _shares(self, start: int, stop: int, rng: np.random.Generator) -> np.ndarray:
+        """Number of the balls start, ..., stop - 1 that go to each dispatcher."""
+        if self.assignment == "random":
+            return rng.multinomial(stop - start, [1 / self.count] * self.count)
+        # Ball k goes to dispatcher k mod D
+        dispatchers = np.arange(self.count)
+        return (stop - 1 - dispatchers) // self.count - (start - 1 - dispatchers) // self.count
@@ -0,0 +1,161 @@
+import heapq
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from balanced_allocations.experiments.base_experiment import BaseExperiment
+from balanced_allocations.utils.ball_weights import BallWeights
+from balanced_allocations.utils.random_buffer import RandomBuffer
+from balanced_allocations.utils.seeding import Seed, seed_sequence
+
+
+@dataclass
+class StationaryLoads:
+    """Max load and gap sampled at equally spaced times after the warm-up of a dynamic run."""
+    num_bins: int
+    time: float  # simulated time, warm-up included
+    arrivals: int
+    departures: int
+    max_loads: np.ndarray
+    gaps: np.ndarray  # max load - balls in the system / m
+
+    @property
+    def events(self) -> int:
+        return self.arrivals + self.departures
+
+    def max_load_distribution(self) -> np.ndarray:
+        """Fraction of the sampled time spent at each max load 0, 1, 2, ..."""
+        return np.bincount(self.max_loads) / len(self.max_loads)
+
+    def summary(self) -> dict:
+        return {
+            "num_bins": self.num_bins,
+            "time": self.time,
+            "arrivals": self.arrivals,
+            "departures": self.departures,
+            "samples": len(self.gaps),
+            "mean_max_load": float(self.max_loads.mean()),
+            "mean_gap": float(self.gaps.mean()),
+            "std_gap": float(self.gaps.std()),
+            "max_load_distribution": self.max_load_distribution().tolist(),
+        }
+
+
+class SupermarketSimulator:
+    """
+    Discrete-event simulation of dynamic balls-into-bins: balls (jobs) arrive, are placed by the
+    experiment's own step() and BinSelector, and depart again.
+
+    Arrivals form a renewal process of rate arrival_rate * m: the times between them are draws of
+    `arrivals` (per-bin interarrival times, exponential with mean 1 / arrival_rate by default)
+    divided by m. Departures follow the discipline:
+      - "fifo":     each bin is a single FIFO server (the supermarket model); a ball departs after
+                    its service time once the balls ahead of it have left
+      - "lifetime": every ball departs after its own service time, wherever it is (infinite servers)
+      - "random":   departures at rate (balls in the system) / mean service time, each removing a
+                    uniformly random ball; needs exponential service times, under which it is
+                    "lifetime" without a heap entry per ball
+
+    Pending departures live in a heap of (time, bin) events. The max load and the gap are sampled
+    every `sample_every` time units after the warm-up, giving their stationary distributions.
+    """
+    DISCIPLINES = ("fifo", "lifetime", "random")
+
+    def __init__(self, experiment: BaseExperiment, arrival_rate: float = 0.9, arrivals: dict | None = None,
+                 service: dict | None = None, discipline: str = "fifo", seed: Seed = None):
+        if discipline not in self.DISCIPLINES:
+            raise ValueError(f"Invalid discipline '{discipline}'. Expected one of {self.DISCIPLINES}.")
+        if arrival_rate <= 0:
+            raise ValueError("arrival_rate must be positive.")
+        if experiment.weighted:
+            raise ValueError("Departures are only supported for unit balls and bins.")
+        if experiment.bins.total_balls():
+            raise ValueError("The experiment's bins must start empty.")
+        service = service or {"distribution": "exponential", "scale": 1.0}
+        if discipline == "random" and service.get("distribution") != "exponential":
+            raise ValueError("The 'random' discipline needs exponential service times.")
+
+        self.experiment = experiment
+        self.discipline = discipline
+        self.num_bins = experiment.num_bins
+        arrival_rng, service_rng, pick_rng = (np.random.default_rng(s) for s in seed_sequence(seed).spawn(3))
+        self.arrivals = BallWeights.from_config(
+            arrivals or {"distribution": "exponential", "scale": 1.0 / arrival_rate}, arrival_rng)
+        self.service = BallWeights.from_config(service, service_rng)
+        self._picks = RandomBuffer(pick_rng, self.num_bins)
+
+    def run(self, duration: float, warmup: float = 0.0, sample_every: float = 1.0) -> StationaryLoads:
+        """Simulate `warmup + duration` time units and sample the loads during the last `duration`."""
+        if duration <= 0 or sample_every <= 0:
+            raise ValueError("duration and sample_every must be positive.")
+        exp = self.experiment
+        bins = exp.bins
+        m = self.num_bins
+        fifo, lifetime = self.discipline == "fifo", self.discipline == "lifetime"
+        next_interarrival, next_service = self.arrivals.next, self.service.next
+
+        end = warmup + duration
+        departures: list[tuple[float, int]] = []  # heap of pending departures
+        balls: list[int] = []  # "random": the bin of every ball in the system
+        max_loads: list[int] = []
+        gaps: list[float] = []
+        arrived = departed = 0
+
+        next_arrival = next_interarrival() / m
+        next_random_departure = math.inf
+        next_sample = warmup
+
+        while True:
+            if self.discipline == "random":
+                next_departure = next_random_departure
+            else:
+                next_departure = departures[0][0] if departures else math.inf
+            now = min(next_arrival, next_departure)
+
+            # The state only changes at events: every sample up to `now` sees the current one
+            while next_sample <= now and next_sample <= end:
+                max_load = bins.max_load()
+                max_loads.append(max_load)
+                gaps.append(max_load - bins.total_balls() / m)
+                next_sample += sample_every
+            if now > end:
+                break
+
+            if next_arrival <= next_departure:
+                chosen = exp.step()
+                bins.add_ball(chosen)
+                arrived += 1
+                if lifetime or (fifo and bins[chosen] == 1):
+                    heapq.heappush(departures, (now + next_service(), chosen))
+                elif not fifo:
+                    balls.append(chosen)
+                next_arrival = now + next_interarrival() / m
+            elif self.discipline == "random":
+                # Swap-remove a uniformly random ball
+                i = int(self._picks.random() * len(balls))
+                chosen = balls[i]
+                balls[i] = balls[-1]
+                balls.pop()
+                bins.remove_ball(chosen)
+                departed += 1
+            else:
+                _, chosen = heapq.heappop(departures)
+                bins.remove_ball(chosen)
+                departed += 1
+                if fifo and bins[chosen]:
+                    heapq.heappush(departures, (now + next_service(), chosen))
+
+            if self.discipline == "random":
+                # Memoryless lifetimes: the next departure is redrawn after every event
+                next_random_departure = now + next_service() / len(balls) if balls else math.inf
+
+        exp.reset()
+        return StationaryLoads(
+            num_bins=m,
+            time=end,
+            arrivals=arrived,
+            departures=departed,
+            max_loads=np.array(max_loads, dtype=np.int64),
+            gaps=np.array(gaps),
+        )
@@ -2,10 +2,28 @@ from .one_choice import OneChoiceExperiment
 from .two_choice import TwoChoiceExperiment
 from .d_choice import DChoiceExperiment
 from .betta_choice import BettaChoiceExperiment
+from .graph_choice import GraphChoiceExperiment
 
 EXPERIMENT_REGISTRY = {
     "one_choice": OneChoiceExperiment,
     "two_choice": TwoChoiceExperiment,
     "d_choice": DChoiceExperiment,
     "betta_choice": BettaChoiceExperiment,
-}
\ No newline at end of file
+    "graph_choice": GraphChoiceExperiment,
+}
+
+from .fluid_limit import (
+    FluidLimitModel,
+    OneChoiceFluidLimit,
+    TwoChoiceFluidLimit,
+    DChoiceFluidLimit,
+    BettaChoiceFluidLimit,
+)
+
+# Fluid-limit predictions of the registered experiments, under the same names
+ANALYTIC_REGISTRY = {
+    "one_choice": OneChoiceFluidLimit,
+    "two_choice": TwoChoiceFluidLimit,
+    "d_choice": DChoiceFluidLimit,
+    "betta_choice": BettaChoiceFluidLimit,
+}
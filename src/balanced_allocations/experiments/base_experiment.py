@@ -1,47 +1,210 @@
+import time
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from balanced_allocations.models.bins import Bins
+from balanced_allocations.models.history import RunHistory
+from balanced_allocations.models.weighted_bins import WeightedBins
+from balanced_allocations.utils.alias_table import AliasTable
+from balanced_allocations.utils.ball_weights import BallWeights
 from balanced_allocations.utils.bin_selector import BinSelector
+from balanced_allocations.utils.checkpointing import RunCheckpointer
+from balanced_allocations.utils.instrumentation import RunStats
+from balanced_allocations.utils.random_buffer import RandomBuffer
+from balanced_allocations.utils.recording import RecordingPolicy
+from balanced_allocations.utils.seeding import Seed, make_rngs
 
 
 class BaseExperiment(ABC):
-    def __init__(self, name: str, num_bins: int, batch_size: int = 1, bin_selection_mode: str = "absolute"):
+    ENGINES = ("scalar", "vectorized")
+
+    def __init__(self, name: str, num_bins: int, batch_size: int = 1, bin_selection_mode: str = "absolute",
+                 engine: str = "scalar", seed: Seed = None, capacities: list[float] | None = None,
+                 ball_weights: dict | float | None = None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Invalid engine '{engine}'. Expected one of {self.ENGINES}.")
+        if bin_selection_mode not in BinSelector.MODES:
+            raise ValueError("Invalid mode")
         self.name = name
-        self.bins = Bins(num_bins)
-        self.selector = BinSelector(self.bins, bin_selection_mode)
+        self.num_bins = num_bins
+        self.bin_selection_mode = bin_selection_mode
+        # Scalar steps draw from the buffered self.random, vectorized steps from self.rng
+        scalar_rng, self.rng, weight_rng = make_rngs(seed)
+
+        # Weighted mode: bins with capacities (a pattern repeated over the bins), chosen in proportion
+        # to capacity through an alias table, and/or balls with random weights
+        self.capacities = None if capacities is None else np.resize(np.asarray(capacities, dtype=float), num_bins)
+        self.alias = None if capacities is None else AliasTable(self.capacities)
+        self.ball_weights = None if ball_weights is None else BallWeights.from_config(ball_weights, weight_rng)
+
+        self.random = RandomBuffer(scalar_rng, num_bins, alias=self.alias)
+        # Built on first use: engines with their own state (level histogram, lockstep) never allocate them
+        self._bins: Bins | WeightedBins | None = None
+        self._selector: BinSelector | None = None
         self.batch_size = batch_size
+        # "vectorized" places a whole batch with array ops (worth it for batch_size > 1)
+        self.engine = engine
+
+    def run(self, balls_end: int, recording: RecordingPolicy | None = None,
+            checkpointer: RunCheckpointer | None = None, instrument: bool = False) -> RunHistory:
+        """
+        Place balls until `balls_end`, recording at the checkpoints of the policy. With `instrument`,
+        the returned history carries a RunStats of the work done and the time spent per phase.
+        """
+        recording = recording or RecordingPolicy()
+        if self.weighted and recording.format == "events":
+            raise ValueError("The 'events' format cannot replay ball weights; use 'snapshots' in weighted mode.")
+        checkpoints = recording.checkpoints(self.num_bins, balls_end)
+        history = recording.new_history(self.num_bins, balls_end)
 
-    def run(self, balls_end: int) -> list[list[int]]:
         balls_placed = 0
-        distribution_history = []
+        next_checkpoint = 0
+
+        saved = checkpointer.load() if checkpointer else None
+        if saved is not None:
+            if saved["finished"]:
+                return saved["history"]
+            # Continue exactly where the saved run stopped, RNG state included
+            self.__dict__.update(saved["experiment"].__dict__)
+            history = saved["history"]
+            balls_placed = saved["balls_placed"]
+            next_checkpoint = saved["next_checkpoint"]
+        if checkpointer:
+            checkpointer.start(balls_placed)
 
-        while balls_placed < balls_end:
-            distribution_history.append(self.bins.distribution())
+        # Uninstrumented runs keep the plain selector kernels and take no timestamps
+        stats = RunStats() if instrument else None
+        self.selector.instrument(stats)
+
+        while True:
+            # Record at the first batch boundary that reaches the next checkpoint
+            if next_checkpoint is not None and balls_placed >= next_checkpoint:
+                recorded = time.perf_counter() if stats is not None else 0.0
+                history.record(balls_placed, self.bins)
+                next_checkpoint = checkpoints.next_after(balls_placed)
+                if stats is not None:
+                    stats.times["recording"] += time.perf_counter() - recorded
+
+            if balls_placed >= balls_end:
+                break
+
+            if checkpointer and checkpointer.due(balls_placed):
+                checkpointer.save({
+                    "finished": False,
+                    "experiment": self,
+                    "history": history,
+                    "balls_placed": balls_placed,
+                    "next_checkpoint": next_checkpoint,
+                })
 
             # Determine current batch size
             current_batch_size = min(self.batch_size, balls_end - balls_placed)
 
-            # Snapshot of bins at batch start
-            batch_bins_snapshot = self.bins.distribution()
-            batch_loads = [0] * len(batch_bins_snapshot)
+            # Place all balls in batch against the bins as they were at batch start;
+            # bins are only updated after the whole batch
+            if stats is not None:
+                self._place_batch_instrumented(current_batch_size, history, stats)
+            elif self.engine == "vectorized":
+                batch_choices = self.step_batch(current_batch_size)
+                self.bins.add_batch(np.bincount(batch_choices, minlength=len(self.bins)))
+                history.add_batch(batch_choices)
+            else:
+                batch_choices = [self.step() for _ in range(current_batch_size)]
+                self.bins.add_balls(batch_choices)
+                history.add_batch(batch_choices)
 
-            # Place all balls in batch using snapshot
-            for _ in range(current_batch_size):
-                chosen_bin = self.step()
-                batch_loads[chosen_bin] += 1
+            balls_placed = self.bins.total_balls()
 
-            # Update global bins after batch
-            self.bins.add_batch(batch_loads)
+        if stats is not None:
+            stats.finish(history.snapshot_copies)
+            history.stats = stats
 
-            balls_placed = self.bins.total_balls()
+        if checkpointer:
+            checkpointer.save({"finished": True, "history": history, "balls_placed": balls_placed})
 
         self.reset()
-        return distribution_history
+        return history
+
+    def _place_batch_instrumented(self, size: int, history: RunHistory, stats: RunStats) -> None:
+        """The batch placement of run(), timing each phase into `stats`."""
+        start = time.perf_counter()
+        if self.engine == "vectorized":
+            batch_choices = self.step_batch(size)
+            chosen = time.perf_counter()
+            self.bins.add_batch(np.bincount(batch_choices, minlength=len(self.bins)))
+        else:
+            batch_choices = [self.step() for _ in range(size)]
+            chosen = time.perf_counter()
+            self.bins.add_balls(batch_choices)
+        committed = time.perf_counter()
+        history.add_batch(batch_choices)
+        stats.add_batch(size, start, chosen, committed, time.perf_counter())
+
+    @property
+    def bins(self):
+        """The per-bin loads of the current run (O(m) memory, allocated on first use)."""
+        if self._bins is None:
+            self._bins = self._new_bins(self.num_bins)
+        return self._bins
+
+    @bins.setter
+    def bins(self, bins) -> None:
+        self._bins = bins
+
+    @property
+    def selector(self) -> BinSelector:
+        if self._selector is None:
+            self._selector = BinSelector(self.bins, self.bin_selection_mode, self.random)
+        return self._selector
+
+    @selector.setter
+    def selector(self, selector: BinSelector) -> None:
+        self._selector = selector
+
+    @property
+    def weighted(self) -> bool:
+        return self.capacities is not None or self.ball_weights is not None
+
+    @property
+    def uniform_candidates(self) -> bool:
+        """Whether every candidate is a uniform bin, which makes the bins exchangeable."""
+        return self.capacities is None and self.choice_rule() is not None
+
+    def _new_bins(self, num_bins: int) -> Bins | WeightedBins:
+        if not self.weighted:
+            return Bins(num_bins)
+        capacities = self.capacities if self.capacities is not None else np.ones(num_bins)
+        return WeightedBins(capacities, self.ball_weights)
 
     def reset(self):
-        self.bins = Bins(len(self.bins))
-        self.selector = BinSelector(self.bins, self.selector.mode)
+        """Drop the bins and selector of the last run; the next run starts from empty ones."""
+        self._bins = self._selector = None
+
+    def _candidates(self, shape: tuple[int, ...]) -> np.ndarray:
+        """Vectorized candidate draw: uniform bins, or weighted by capacity in weighted mode."""
+        if self.alias is not None:
+            return self.alias.sample(self.rng, shape)
+        return self.rng.integers(self.num_bins, size=shape)
 
     @abstractmethod
     def step(self) -> int:
         """Run the experiment and store results in attributes."""
+
+    @abstractmethod
+    def step_batch(self, size: int, trials: int | None = None) -> np.ndarray:
+        """
+        Vectorized step: choose a bin for each of `size` balls against the current bins.
+        With `trials`, the bins are a BinsMatrix and the result has shape (trials, size).
+        """
+
+    def choice_rule(self) -> tuple[int, float] | None:
+        """
+        (d, β): with probability β a ball goes to the best of d uniform candidates, otherwise
+        to a uniformly random one of the first two (or the only one when d = 1).
+        None for experiments whose candidates are not uniform bins.
+        """
+        return None
+
+    def _batch_shape(self, size: int, trials: int | None) -> tuple[int, ...]:
+        return (size,) if trials is None else (trials, size)
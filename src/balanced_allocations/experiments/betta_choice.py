@@ -1,26 +1,45 @@
-import random
+import numpy as np
+
+from balanced_allocations.utils.seeding import Seed
 
 from .base_experiment import BaseExperiment
 
 
 class BettaChoiceExperiment(BaseExperiment):
-    def __init__(self, num_bins: int, betta: float, batch_size: int = 1, bin_selection_mode: str = "absolute"):
+    def __init__(self, num_bins: int, betta: float, batch_size: int = 1, bin_selection_mode: str = "absolute",
+                 engine: str = "scalar", seed: Seed = None, capacities: list[float] | None = None,
+                 ball_weights: dict | float | None = None):
         if not (0 <= betta <= 1):
             raise ValueError("betta must be between 0 and 1.")
-        super().__init__("betta_choice", num_bins, batch_size, bin_selection_mode)
+        super().__init__("betta_choice", num_bins, batch_size, bin_selection_mode, engine, seed,
+                         capacities, ball_weights)
         self.betta = betta
 
     def step(self):
         """Perform one allocation step according to the (1 + β)-choice rule."""
-        candidate_1 = random.randrange(len(self.bins))
-        candidate_2 = random.randrange(len(self.bins))
+        candidates, start = self.random.take(2)
 
         # Decide between one-choice and two-choice
-        if random.random() < self.betta:
+        if self.random.random() < self.betta:
             # Two-choice scheme (β branch)
-            winner = self.selector.choose_bin([candidate_1, candidate_2])
+            winner = self.selector.choose_bin(candidates, start, start + 2)
         else:
             # One-choice scheme (1-β branch)
-            winner = random.choice([candidate_1, candidate_2])
+            winner = candidates[start + self.random.bit()]
 
         return winner
+
+    def choice_rule(self) -> tuple[int, float]:
+        return 2, self.betta
+
+    def step_batch(self, size: int, trials: int | None = None) -> np.ndarray:
+        shape = self._batch_shape(size, trials)
+        candidates = self._candidates(shape + (2,))
+
+        # One-choice scheme: a uniformly random candidate of the pair
+        pick = self.rng.integers(2, size=shape)
+        one_choice = np.take_along_axis(candidates, pick[..., None], axis=-1)[..., 0]
+
+        # Two-choice scheme on the β fraction of balls
+        two_choice = self.rng.random(shape) < self.betta
+        return np.where(two_choice, self.selector.choose_bins(candidates, self.rng), one_choice)
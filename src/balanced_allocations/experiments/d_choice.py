@@ -1,12 +1,24 @@
-import random
+import numpy as np
+
+from balanced_allocations.utils.seeding import Seed
 
 from .base_experiment import BaseExperiment
 
 class DChoiceExperiment(BaseExperiment):
-    def __init__(self, num_bins: int, d: int, batch_size: int = 1, bin_selection_mode: str = "absolute"):
-        super().__init__("d_choice", num_bins, batch_size, bin_selection_mode)
+    def __init__(self, num_bins: int, d: int, batch_size: int = 1, bin_selection_mode: str = "absolute",
+                 engine: str = "scalar", seed: Seed = None, capacities: list[float] | None = None,
+                 ball_weights: dict | float | None = None):
+        super().__init__("d_choice", num_bins, batch_size, bin_selection_mode, engine, seed,
+                         capacities, ball_weights)
         self.d = d
 
     def step(self):
-        candidates = [random.randrange(len(self.bins)) for _ in range(self.d)]
-        return self.selector.choose_bin(candidates)
\ No newline at end of file
+        candidates, start = self.random.take(self.d)
+        return self.selector.choose_bin(candidates, start, start + self.d)
+
+    def choice_rule(self) -> tuple[int, float]:
+        return self.d, 1.0
+
+    def step_batch(self, size: int, trials: int | None = None) -> np.ndarray:
+        candidates = self._candidates(self._batch_shape(size, trials) + (self.d,))
+        return self.selector.choose_bins(candidates, self.rng)
\ No newline at end of file
@@ -0,0 +1,192 @@
+import inspect
+import math
+
+import numpy as np
+from scipy.stats import poisson
+
+from balanced_allocations.models.gap_summary import GapSummary
+from balanced_allocations.utils.recording import RecordingPolicy
+
+
+class FluidLimitModel:
+    """
+    Analytic counterpart of an experiment: the fluid limit (m -> infinity) of the fraction s_i(t)
+    of bins with load >= i after t = n/m balls per bin,
+
+        ds_i/dt = g(s_{i-1}) - g(s_i),   g(x) = β x^d + (1 - β) x,   s_0 = 1,
+
+    where a ball goes to the least loaded of d uniform candidates with probability β and to a
+    uniform bin otherwise. The predicted gap for m bins is E[max load] - t, with
+    E[max load] = sum_i P(max >= i) ~= sum_i (1 - exp(-m s_i(t))).
+
+    The system is integrated with RK4 over a NumPy window of the levels where s_i is neither 0 nor 1
+    (to within FULL): it slides up past full levels and grows so that its top PADDING levels stay
+    empty, since one RK4 step moves mass up at most four levels.
+    For β > 0 and d >= 2 the profile becomes a travelling wave (s_{i+1}(t+1) = s_i(t)), after which
+    the gap is periodic in t with period 1 and the rest of the curve is read off that period.
+    Without any choice (d = 1 or β = 0) s_i(t) is the Poisson tail P(Poisson(t) >= i).
+
+    Only the absolute mode is modelled; batches much smaller than m have the same limit.
+    """
+    DT = 0.1
+    LEVELS = 256  # initial width of the integration window
+    PADDING = 8  # empty levels kept at the top of the window
+    FULL = 1e-12  # a level with s_i >= 1 - FULL counts as full
+    TOLERANCE = 1e-10  # max change of the profile over one unit of time that counts as stationary
+
+    def __init__(self, num_bins: int, d: int = 2, betta: float = 1.0, bin_selection_mode: str = "absolute"):
+        if num_bins <= 0:
+            raise ValueError("Number of bins must be positive.")
+        if d < 1:
+            raise ValueError("d must be at least 1.")
+        if not (0 <= betta <= 1):
+            raise ValueError("betta must be between 0 and 1.")
+        if bin_selection_mode != "absolute":
+            raise ValueError("The fluid limit is only available for the 'absolute' selection mode.")
+        self.num_bins = num_bins
+        self.d = d
+        self.betta = betta
+
+    @classmethod
+    def from_params(cls, params: dict) -> "FluidLimitModel":
+        """Build the model from an experiment's parameters, ignoring those it has no use for."""
+        accepted = inspect.signature(cls.__init__).parameters
+        return cls(**{k: v for k, v in params.items() if k in accepted and k != "self"})
+
+    def run(self, balls_end: int, recording: RecordingPolicy | None = None) -> GapSummary:
+        """Predicted gaps at the checkpoints the recording policy would use for a simulation."""
+        recording = recording or RecordingPolicy()
+        ns = self._checkpoint_values(recording.checkpoints(self.num_bins, balls_end))
+        times = np.asarray(ns, dtype=float) / self.num_bins
+
+        if self.d == 1 or self.betta == 0:
+            gaps = self._poisson_gaps(times)
+        else:
+            gaps = self._integrate(times)
+
+        m_index = min(int(np.searchsorted(ns, self.num_bins)), len(ns) - 1)
+        return GapSummary(
+            num_bins=self.num_bins,
+            ns=ns,
+            mean=gaps.tolist(),
+            std=[0.0] * len(ns),
+            gaps_at_m=[float(gaps[m_index])],
+            gaps_at_m2=[float(gaps[-1])],
+        )
+
+    @staticmethod
+    def _checkpoint_values(checkpoints) -> list[int]:
+        ns = []
+        n = 0
+        while n is not None:
+            ns.append(n)
+            n = checkpoints.next_after(n)
+        return ns
+
+    def _expected_max(self, low: int, s: np.ndarray) -> float:
+        """E[max load] when every level below `low` is full and s holds the levels from `low` up."""
+        return (low - 1) - np.expm1(-self.num_bins * s).sum()
+
+    def _poisson_gaps(self, times: np.ndarray) -> np.ndarray:
+        gaps = np.zeros(len(times))
+        for k, t in enumerate(times):
+            if t == 0:
+                continue
+            # Below t - 12 sqrt(t) every bin is full up to 1e-30, above t + 12 sqrt(t) + 40 empty
+            spread = 12 * math.sqrt(t) + 40
+            low = max(1, int(t - spread))
+            levels = np.arange(low, int(t + spread) + 1)
+            gaps[k] = self._expected_max(low, poisson.sf(levels - 1, t)) - t
+        return gaps
+
+    def _drift(self, s: np.ndarray) -> np.ndarray:
+        g = self.betta * s ** self.d + (1 - self.betta) * s
+        return np.concatenate(([1.0], g[:-1])) - g  # g(s_0) = g(1) = 1
+
+    def _rk4(self, s: np.ndarray, dt: float) -> np.ndarray:
+        k1 = self._drift(s)
+        k2 = self._drift(s + dt / 2 * k1)
+        k3 = self._drift(s + dt / 2 * k2)
+        k4 = self._drift(s + dt * k3)
+        return np.clip(s + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4), 0.0, 1.0)
+
+    def _integrate(self, times: np.ndarray) -> np.ndarray:
+        gaps = np.empty(len(times))
+        low = 1  # absolute level of s[0]
+        s = np.zeros(self.LEVELS)
+        t = 0.0
+        i = 0
+        previous = None  # (low, s) at the last integer time
+        period: list[tuple[float, float]] = []  # (t, gap) over the last unit of time
+        stationary_from = None
+
+        while i < len(times):
+            while i < len(times) and times[i] <= t + 1e-12:
+                gaps[i] = self._expected_max(low, s) - times[i]
+                i += 1
+            period.append((t, self._expected_max(low, s) - t))
+
+            if abs(t - round(t)) < 1e-12 and t > 0:
+                # One unit of time later a stationary profile has moved up exactly one level
+                if previous is not None and self._shifted_by_one(previous, (low, s)):
+                    stationary_from = round(t) - 1
+                    break
+                previous = (low, s.copy())
+                period = [(t, self._expected_max(low, s) - t)]
+            if i == len(times):
+                break
+
+            step = min(self.DT, times[i] - t, math.floor(t + 1e-12) + 1 - t)
+            stepped = self._rk4(s, step)
+            while stepped[-1] != 0:
+                # Mass reached the top level within the step: redo it on a window twice as wide
+                s = np.pad(s, (0, len(s)))
+                stepped = self._rk4(s, step)
+            s = stepped
+            t += step
+            # Slide the window past its full levels, and grow it while mass nears the top
+            full = int(np.searchsorted(-s, -(1 - self.FULL), side="right"))
+            if full:
+                s = s[full:]
+                low += full
+            top = int(np.flatnonzero(s)[-1]) + 1 if s.any() else 0
+            if len(s) < top + self.PADDING:
+                s = np.concatenate((s, np.zeros(top + 2 * self.PADDING - len(s))))
+
+        if stationary_from is not None and i < len(times):
+            # The gap repeats with period 1 from here on
+            period_t, period_gaps = (np.array(column) for column in zip(*period))
+            phase = (times[i:] - stationary_from) % 1.0
+            gaps[i:] = np.interp(phase, period_t - period_t[0], period_gaps)
+        return gaps
+
+    def _shifted_by_one(self, before: tuple[int, np.ndarray], after: tuple[int, np.ndarray]) -> bool:
+        (low_before, s_before), (low_after, s_after) = before, after
+        # s_after at level l + 1 against s_before at level l, over both windows
+        offset = (low_after - 1) - low_before
+        if offset < 0:
+            return False
+        shifted = s_before[offset:]
+        size = max(len(shifted), len(s_after))
+        shifted = np.pad(shifted, (0, size - len(shifted)))
+        return float(np.max(np.abs(shifted - np.pad(s_after, (0, size - len(s_after)))))) < self.TOLERANCE
+
+
+class OneChoiceFluidLimit(FluidLimitModel):
+    def __init__(self, num_bins: int, bin_selection_mode: str = "absolute"):
+        super().__init__(num_bins, d=1, betta=1.0, bin_selection_mode=bin_selection_mode)
+
+
+class TwoChoiceFluidLimit(FluidLimitModel):
+    def __init__(self, num_bins: int, bin_selection_mode: str = "absolute"):
+        super().__init__(num_bins, d=2, betta=1.0, bin_selection_mode=bin_selection_mode)
+
+
+class DChoiceFluidLimit(FluidLimitModel):
+    def __init__(self, num_bins: int, d: int, bin_selection_mode: str = "absolute"):
+        super().__init__(num_bins, d=d, betta=1.0, bin_selection_mode=bin_selection_mode)
+
+
+class BettaChoiceFluidLimit(FluidLimitModel):
+    def __init__(self, num_bins: int, betta: float, bin_selection_mode: str = "absolute"):
+        super().__init__(num_bins, d=2, betta=betta, bin_selection_mode=bin_selection_mode)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from balanced_allocations.utils.graph import Graph
+from balanced_allocations.utils.seeding import Seed
+
+from .base_experiment import BaseExperiment
+
+
+class GraphChoiceExperiment(BaseExperiment):
+    """
+    Allocation constrained by a graph on the bins: a ball only reaches nearby bins.
+
+    With sample="vertex" the ball picks a random vertex and chooses among it and d - 1 random
+    neighbours; with sample="edge" it picks a uniform edge and chooses between its two endpoints.
+    The choice itself is the BinSelector's, in any of its modes.
+    """
+    SAMPLES = ("vertex", "edge")
+
+    def __init__(self, num_bins: int, graph: dict, sample: str = "vertex", d: int = 2, batch_size: int = 1,
+                 bin_selection_mode: str = "absolute", engine: str = "scalar", seed: Seed = None,
+                 capacities: list[float] | None = None, ball_weights: dict | float | None = None):
+        if sample not in self.SAMPLES:
+            raise ValueError(f"Invalid sample '{sample}'. Expected one of {self.SAMPLES}.")
+        if d < 1:
+            raise ValueError("d must be at least 1.")
+        if sample == "edge" and d != 2:
+            raise ValueError("An edge gives exactly two candidates; use d = 2.")
+        super().__init__("graph_choice", num_bins, batch_size, bin_selection_mode, engine, seed,
+                         capacities, ball_weights)
+        self.sample = sample
+        self.d = d
+
+        # A 'seed' in the graph block fixes the topology across trials; otherwise each trial draws its own
+        graph = dict(graph)
+        graph_rng = np.random.default_rng(graph.pop("seed")) if "seed" in graph else self.rng.spawn(1)[0]
+        self.graph = Graph.from_config(graph, num_bins, graph_rng)
+
+        # Scalar steps read the CSR arrays through memoryviews, which index to plain ints
+        self._indptr = memoryview(self.graph.indptr)
+        self._indices = memoryview(self.graph.indices)
+        self._sources = memoryview(self.graph.sources)
+        self._candidate_buffer = [0] * d
+
+    def step(self):
+        candidates = self._candidate_buffer
+        indptr, indices = self._indptr, self._indices
+        if self.sample == "edge":
+            position = int(self.random.random() * len(indices))
+            candidates[0] = self._sources[position]
+            candidates[1] = indices[position]
+        else:
+            v = self.random.index()
+            candidates[0] = v
+            start, degree = indptr[v], indptr[v + 1] - indptr[v]
+            for j in range(1, self.d):
+                candidates[j] = indices[start + int(self.random.random() * degree)]
+        return self.selector.choose_bin(candidates, 0, self.d)
+
+    def step_batch(self, size: int, trials: int | None = None) -> np.ndarray:
+        shape = self._batch_shape(size, trials)
+        if self.sample == "edge":
+            sources, targets = self.graph.edge_endpoints(self.rng.integers(len(self.graph.indices), size=shape))
+            candidates = np.stack((sources, targets), axis=-1)
+        else:
+            vertices = self._candidates(shape)[..., None]
+            neighbors = self.graph.random_neighbors(vertices, self.rng.random(shape + (self.d - 1,)))
+            candidates = np.concatenate((vertices, neighbors), axis=-1)
+        return self.selector.choose_bins(candidates, self.rng)
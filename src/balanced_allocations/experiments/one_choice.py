@@ -1,11 +1,22 @@
-import random
+import numpy as np
+
+from balanced_allocations.utils.seeding import Seed
 
 from .base_experiment import BaseExperiment
 
 class OneChoiceExperiment(BaseExperiment):
-    def __init__(self, num_bins: int, batch_size: int = 1, bin_selection_mode: str = "absolute"):
-        super().__init__("one_choice", num_bins, batch_size, bin_selection_mode)
+    def __init__(self, num_bins: int, batch_size: int = 1, bin_selection_mode: str = "absolute",
+                 engine: str = "scalar", seed: Seed = None, capacities: list[float] | None = None,
+                 ball_weights: dict | float | None = None):
+        super().__init__("one_choice", num_bins, batch_size, bin_selection_mode, engine, seed,
+                         capacities, ball_weights)
 
     def step(self):
-        candidate = random.randrange(len(self.bins))
-        return candidate
\ No newline at end of file
+        candidate = self.random.index()
+        return candidate
+
+    def choice_rule(self) -> tuple[int, float]:
+        return 1, 1.0
+
+    def step_batch(self, size: int, trials: int | None = None) -> np.ndarray:
+        return self._candidates(self._batch_shape(size, trials))
\ No newline at end of file
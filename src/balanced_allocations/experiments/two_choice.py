@@ -1,13 +1,23 @@
-import random
+import numpy as np
+
+from balanced_allocations.utils.seeding import Seed
 
 from .base_experiment import BaseExperiment
 
 class TwoChoiceExperiment(BaseExperiment):
-    def __init__(self, num_bins: int, batch_size: int = 1, bin_selection_mode: str = "absolute"):
-        super().__init__("two_choice", num_bins, batch_size, bin_selection_mode)
+    def __init__(self, num_bins: int, batch_size: int = 1, bin_selection_mode: str = "absolute",
+                 engine: str = "scalar", seed: Seed = None, capacities: list[float] | None = None,
+                 ball_weights: dict | float | None = None):
+        super().__init__("two_choice", num_bins, batch_size, bin_selection_mode, engine, seed,
+                         capacities, ball_weights)
 
     def step(self):
-        candidate_1 = random.randrange(len(self.bins))
-        candidate_2 = random.randrange(len(self.bins))
+        candidates, start = self.random.take(2)
+        return self.selector.choose_bin(candidates, start, start + 2)
+
+    def choice_rule(self) -> tuple[int, float]:
+        return 2, 1.0
 
-        return self.selector.choose_bin([candidate_1, candidate_2])
+    def step_batch(self, size: int, trials: int | None = None) -> np.ndarray:
+        candidates = self._candidates(self._batch_shape(size, trials) + (2,))
+        return self.selector.choose_bins(candidates, self.rng)
@@ -1,21 +1,38 @@
 import argparse
+import json
 import os
+import shutil
 import statistics
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 
+import numpy as np
 import yaml
 from pathlib import Path
 
 from matplotlib import pyplot as plt
 
+from src.balanced_allocations.distributed import (TrialCoordinator, decode_result, decode_trial, encode_result,
+                                                  parse_address, run_worker, trial_spec)
+from src.balanced_allocations.engines import (CommonRandomSimulator, LevelHistogramSimulator, LockstepSimulator,
+                                              MultiDispatcherSimulator, PairedAggregator, PairedComparison,
+                                              StationaryLoads, SupermarketSimulator)
 from src.balanced_allocations.experiments.base_experiment import BaseExperiment
-from src.balanced_allocations.utils.bin_checker import bin_distro_where_n_equal_m, max_gap
-from src.balanced_allocations.experiments import EXPERIMENT_REGISTRY
+from src.balanced_allocations.experiments import ANALYTIC_REGISTRY, EXPERIMENT_REGISTRY
+from src.balanced_allocations.models.gap_summary import GapAggregator, GapSummary
+from src.balanced_allocations.models.history import RunHistory
+from src.balanced_allocations.utils.checkpointing import RunCheckpointer
+from src.balanced_allocations.utils.precision import PrecisionTarget
+from src.balanced_allocations.utils.recording import RecordingPolicy
+from src.balanced_allocations.utils.seeding import Seed, seed_sequence, trial_seeds
 
 
 # --- Paths ---
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_CONFIG = PROJECT_ROOT / "config" / "config_balanced_allocations.yaml"
 RESULTS_DIR = PROJECT_ROOT / "results" / "balanced_allocations"
+CHECKPOINT_DIR = RESULTS_DIR / "checkpoints"
+HISTORY_DIR = RESULTS_DIR / "histories"
 
 
 def parse_args():
@@ -39,6 +56,49 @@ def parse_args():
         action="append",
         help="Override parameters, e.g. -p m=100"
     )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="Number of worker processes the trials are spread across."
+    )
+    parser.add_argument(
+        "--seed", "-s",
+        type=int,
+        help="Root seed; every trial gets its own seed derived from it. A 'seed' in the YAML takes precedence."
+    )
+    parser.add_argument(
+        "--checkpoint-seconds",
+        type=float,
+        help="Save the state of each running trial to disk every this many seconds."
+    )
+    parser.add_argument(
+        "--checkpoint-balls",
+        type=int,
+        help="Save the state of each running trial to disk every this many balls."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue trials from their last checkpoint (not supported with lockstep)."
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="Count the work done and time each phase of every trial (not with lockstep, levels or dispatchers)."
+    )
+    parser.add_argument(
+        "--serve",
+        type=str,
+        metavar="HOST:PORT",
+        help="Coordinate: hand the trials out to workers connecting to this address instead of running them here."
+    )
+    parser.add_argument(
+        "--connect",
+        type=str,
+        metavar="HOST:PORT",
+        help="Work: run trials for the coordinator at this address, in --workers local processes, until it is done."
+    )
     return parser.parse_args()
 
 
@@ -51,12 +111,20 @@ def load_config(path: str | Path):
             - m: 100
             n_values: [100, 500, 1000, 2500, 5000, 7500, 10000]
             trials: 50
+      comparisons:            # optional: protocols run on common random numbers
+        protocols:
+          num_bins: 100
+          T: 20
+          variants:
+            - experiment: two_choice
+            - experiment: d_choice
+              d: 3
     """
     with open(path, "r", encoding="utf-8") as f:
         cfg = yaml.safe_load(f)
 
-    if "experiments" not in cfg:
-        raise ValueError("YAML must contain a top-level 'experiments' key.")
+    if "experiments" not in cfg and "comparisons" not in cfg:
+        raise ValueError("YAML must contain a top-level 'experiments' or 'comparisons' key.")
     return cfg
 
 
@@ -89,69 +157,379 @@ def merge_overrides(base_params, overrides):
     return {**base_params, **overrides}
 
 
-def run_experiment(exp_name, params, filename):
+def run_trial(exp_name: str, params: dict, recording: RecordingPolicy, seed: Seed,
+              checkpointer: RunCheckpointer | None = None, levels: bool = False,
+              instrument: bool = False, dispatchers: dict | None = None) -> RunHistory:
+    """
+    Run one trial of an experiment to n = m^2. Module-level so worker processes can pickle it.
+    With `levels`, the trial runs on a load-level histogram instead of one load per bin; with
+    `dispatchers` (count, refresh, assignment, workers), several dispatchers place the balls
+    on stale views of the loads.
+    """
+    exp: BaseExperiment = EXPERIMENT_REGISTRY[exp_name](**params, seed=seed)
+    if dispatchers:
+        return MultiDispatcherSimulator(exp, **dispatchers).run(exp.num_bins ** 2, recording)
+    if levels:
+        return LevelHistogramSimulator(exp).run(exp.num_bins ** 2, recording)
+    return exp.run(exp.num_bins ** 2, recording, checkpointer, instrument)
+
+
+def run_remote_trial(spec: dict) -> dict:
+    """Run a trial received from a coordinator and return its gap metrics."""
+    exp_name, params, recording, seed, levels, instrument, dispatchers = decode_trial(spec)
+    return encode_result(spec, run_trial(exp_name, params, recording, seed, levels=levels, instrument=instrument,
+                                         dispatchers=dispatchers))
+
+
+def run_experiment(exp_name, params, filename, workers: int = 1, seed: int | None = None,
+                   checkpoint_seconds: float | None = None, checkpoint_balls: int | None = None,
+                   resume: bool = False, instrument: bool = False, coordinator: TrialCoordinator | None = None):
     """
-    Instantiate and execute a single experiment T times.
+    Instantiate and execute a single experiment T times, or, with a 'precision' block instead
+    of T, until the mean gap at n = m and n = m^2 is known to the requested precision.
+    With 'analytic' the fluid-limit prediction is plotted instead of simulating; with
+    'overlay_analytic' it is drawn over the simulated gaps. A 'supermarket' block runs T
+    dynamic trials with departures instead (see run_supermarket), and a 'dispatchers' block
+    places the balls of every trial through several dispatchers with stale loads.
+    With a coordinator, the trials are run by remote workers (lockstep and dynamic runs stay local).
     """
     if exp_name not in EXPERIMENT_REGISTRY:
         raise KeyError(f"Experiment '{exp_name}' not found in registry.")
     exp_cls = EXPERIMENT_REGISTRY[exp_name]
 
     T = params.pop("T", 1)  # default to 1 if T not specified
-    results_list = []
-    batch_size = params.get("batch_size", 1)
-
-    for t in range(1, T + 1):
-        exp: BaseExperiment = exp_cls(**params)
-        results = exp.run(len(exp.bins) ** 2)
-        results_list.append(results)
-        print(f"Run {t}/{T} of {exp_name}")
+    precision = params.pop("precision", None)
+    target = PrecisionTarget.from_config(precision) if precision else None
+    recording = RecordingPolicy.from_config(params.pop("recording", None))
+    if recording.format == "memmap" and recording.directory is None:
+        recording.directory = HISTORY_DIR
+    lockstep = params.pop("lockstep", False)
+    levels = params.pop("levels", False)
+    analytic = params.pop("analytic", False)
+    overlay_analytic = params.pop("overlay_analytic", False)
+    supermarket = params.pop("supermarket", None)
+    dispatchers = params.pop("dispatchers", None)
+    seed = params.pop("seed", seed)
 
     ylim = 10
     if exp_name == "one_choice":
         ylim = 30
 
-    plot_results(results_list, filename, batch_size, ylim)
+    prediction = None
+    if analytic or overlay_analytic:
+        prediction = ANALYTIC_REGISTRY[exp_name].from_params(params).run(params["num_bins"] ** 2, recording)
+    if analytic:
+        print(f"Computed the fluid-limit gaps of {exp_name}")
+        plot_results(prediction, filename, ylim)
+        return
+
+    # Checkpoints of this experiment's trials live in one folder, removed once the plots are saved
+    checkpointing = (not lockstep and not levels and not dispatchers and coordinator is None
+                     and (checkpoint_seconds or checkpoint_balls or resume))
+    checkpoint_dir = CHECKPOINT_DIR / filename
+    seed_file = checkpoint_dir / "root_seed.txt"
+    if checkpointing and resume and seed is None and seed_file.exists():
+        seed = int(seed_file.read_text())  # trials not started yet get the seeds of the interrupted run
+
+    root_seed = seed_sequence(seed)
+    print(f"Root seed entropy of {exp_name}: {root_seed.entropy}")
+    if checkpointing:
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        seed_file.write_text(str(root_seed.entropy))
+
+    if supermarket:
+        run_supermarket(exp_name, params, filename, supermarket, T, root_seed, workers)
+        return
+
+    if lockstep and dispatchers:
+        raise ValueError("Dispatchers run one trial at a time; they cannot be combined with lockstep.")
+    if lockstep and target:
+        raise ValueError("A precision target needs trials one by one; use a fixed T with lockstep.")
+
+    if lockstep:
+        # All T trials advance together in one (T, m) load matrix
+        exp: BaseExperiment = exp_cls(**params, seed=root_seed)
+        summary = LockstepSimulator(exp, T).run(exp.num_bins ** 2, recording)
+        print(f"Ran {T} trials of {exp_name} in lockstep")
+    else:
+        max_trials = target.max_trials if target else T
+        balls_end = params["num_bins"] ** 2
+        # Trial t always gets the t-th seed, however many trials end up being run
+        seeds = trial_seeds(root_seed, max_trials)
+
+        def trial_args(t: int) -> tuple:
+            checkpointer = RunCheckpointer(checkpoint_dir / f"trial_{t}.pkl", checkpoint_seconds,
+                                           checkpoint_balls, resume) if checkpointing else None
+            trial_recording = recording.named(f"{filename}_trial_{t}")  # memmap files: one per trial
+            return exp_name, params, trial_recording, seeds[t - 1], checkpointer, levels, instrument, dispatchers
+
+        # Every trial is folded into the aggregator as soon as it finishes and then dropped
+        aggregator = GapAggregator(params["num_bins"])
+        trial_stats = []
+
+        def collect(t: int, results: RunHistory) -> bool:
+            """Fold in trial t; True once no more trials are needed."""
+            aggregator.add_history(results)
+            print(f"Run {t}/{max_trials if not target else f'at most {max_trials}'} of {exp_name}")
+            if results.stats is not None:
+                print(f"  {results.stats.report()}")
+                trial_stats.append({"trial": t, **results.stats.as_dict()})
+            return target is not None and target.done(aggregator, balls_end)
+
+        if coordinator is not None:
+            # Results are folded in trial order, so remote runs aggregate exactly like local ones
+            specs = [trial_spec(t, exp_name, params, recording.named(f"{filename}_trial_{t}"), seeds[t - 1],
+                                levels, instrument, dispatchers) for t in range(1, max_trials + 1)]
+            for t, result in coordinator.run(specs):
+                if collect(t, decode_result(result, params["num_bins"])):
+                    break
+        elif workers > 1:
+            # pool.map yields the trials in submission order, so the output does not depend on the worker count.
+            # With a precision target the trials go out in waves of `workers`, and the trials of the last wave
+            # beyond the stopping point are dropped, so the stopping point does not depend on it either.
+            wave = workers if target else T
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for first in range(1, max_trials + 1, wave):
+                    ts = range(first, min(first + wave, max_trials + 1))
+                    trials = pool.map(run_trial, *zip(*(trial_args(t) for t in ts)))
+                    if any(collect(t, results) for t, results in zip(ts, trials)):
+                        break
+        else:
+            for t in range(1, max_trials + 1):
+                if collect(t, run_trial(*trial_args(t))):
+                    break
+        summary = aggregator.summary()
+
+        if target:
+            half_m, half_m2 = target.half_widths(aggregator, balls_end)
+            print(f"Used {aggregator.trials} trials of {exp_name}: {target.confidence:.0%} CI half-width "
+                  f"{half_m:.3f} at n = m and {half_m2:.3f} at n = m^2 (target {target.half_width})")
+            with open(RESULTS_DIR / f"{filename}_precision.json", "w", encoding="utf-8") as f:
+                json.dump({
+                    "trials": aggregator.trials,
+                    "half_width_at_m": half_m,
+                    "half_width_at_m2": half_m2,
+                    "target": vars(target),
+                    "reached": max(half_m, half_m2) <= target.half_width,
+                }, f, indent=2)
+
+        if trial_stats:
+            with open(RESULTS_DIR / f"{filename}_stats.json", "w", encoding="utf-8") as f:
+                json.dump(trial_stats, f, indent=2)
+
+    plot_results(summary, filename, ylim, prediction)
+
+    if checkpointing:
+        shutil.rmtree(checkpoint_dir)
+
+def run_supermarket_trial(exp_name: str, params: dict, supermarket: dict, seed: Seed) -> StationaryLoads:
+    """One dynamic trial with departures. Module-level so worker processes can pickle it."""
+    experiment_seed, event_seed = seed_sequence(seed).spawn(2)
+    exp: BaseExperiment = EXPERIMENT_REGISTRY[exp_name](**params, seed=experiment_seed)
+    run_args = {k: v for k, v in supermarket.items() if k in ("duration", "warmup", "sample_every")}
+    simulator_args = {k: v for k, v in supermarket.items() if k not in run_args}
+    return SupermarketSimulator(exp, **simulator_args, seed=event_seed).run(**run_args)
+
+
+def run_supermarket(exp_name: str, params: dict, filename: str, supermarket: dict, T: int,
+                    root_seed: np.random.SeedSequence, workers: int = 1) -> None:
+    """
+    Run T dynamic trials of an experiment (arrivals and departures) and pool their samples into
+    the stationary max-load and gap distributions, saved to JSON and plotted.
+    """
+    seeds = trial_seeds(root_seed, T)
+    args = [(exp_name, params, supermarket, trial_seed) for trial_seed in seeds]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            trials = list(pool.map(run_supermarket_trial, *zip(*args)))
+    else:
+        trials = [run_supermarket_trial(*trial_args) for trial_args in args]
+
+    pooled = StationaryLoads(
+        num_bins=params["num_bins"],
+        time=sum(trial.time for trial in trials),
+        arrivals=sum(trial.arrivals for trial in trials),
+        departures=sum(trial.departures for trial in trials),
+        max_loads=np.concatenate([trial.max_loads for trial in trials]),
+        gaps=np.concatenate([trial.gaps for trial in trials]),
+    )
+    summary = pooled.summary()
+    print(f"Ran {T} dynamic trials of {exp_name}: {pooled.events:,} events, "
+          f"mean max load {summary['mean_max_load']:.3f}, mean gap {summary['mean_gap']:.3f}")
+    with open(RESULTS_DIR / f"{filename}_supermarket.json", "w", encoding="utf-8") as f:
+        json.dump({"trials": T, "config": supermarket, **summary}, f, indent=2)
 
-def plot_results(results_list: list[list[list[int]]], filename_base: str, batch_size: int = 1, ylim: int = 10) -> None:
+    plt.figure(figsize=(8, 5))
+    distribution = pooled.max_load_distribution()
+    plt.bar(range(len(distribution)), distribution, edgecolor='black')
+    plt.xlabel("Max load")
+    plt.ylabel("Fraction of time")
+    plt.title(f"Stationary max load (Experiment {filename})\n"
+              f"Mean = {summary['mean_max_load']:.2f}")
+    plt.grid(axis='y')
+    plt.tight_layout()
+    plt.savefig(RESULTS_DIR / f"{filename}_stationary_max_load.png")
+    plt.close()
+
+    plt.figure(figsize=(8, 5))
+    plt.hist(pooled.gaps, bins=50, edgecolor='black')
+    plt.xlabel("Gap G")
+    plt.ylabel("Frequency")
+    plt.title(f"Stationary gap (Experiment {filename})\n"
+              f"Mean = {summary['mean_gap']:.2f}, Std = {summary['std_gap']:.2f}")
+    plt.grid(axis='y')
+    plt.tight_layout()
+    plt.savefig(RESULTS_DIR / f"{filename}_stationary_gaps.png")
+    plt.close()
+
+
+def variant_label(spec: dict) -> str:
+    """Label of a comparison variant: its 'label', or the experiment name and its own parameters."""
+    if "label" in spec:
+        return spec["label"]
+    params = {k: v for k, v in spec.items() if k != "experiment"}
+    if not params:
+        return spec["experiment"]
+    return spec["experiment"] + "(" + ", ".join(f"{k}={v}" for k, v in params.items()) + ")"
+
+
+def run_comparison_trial(variants: dict[str, tuple[str, dict]], recording: RecordingPolicy,
+                         seed: Seed) -> tuple[list[int], dict[str, list[float]]]:
+    """One paired trial of all variants to n = m^2. Module-level so worker processes can pickle it."""
+    simulator = CommonRandomSimulator({
+        label: EXPERIMENT_REGISTRY[exp_name](**params, seed=0)  # the shared stream replaces their own draws
+        for label, (exp_name, params) in variants.items()
+    })
+    return simulator.run_trial(simulator.num_bins ** 2, seed, recording)
+
+
+def run_comparison(name: str, params: dict, workers: int = 1, seed: int | None = None):
     """
-    Plot results from multiple experiments.
+    Run the variants of a comparison T times on common random numbers and report the gap
+    differences to the first variant, paired trial by trial.
+    """
+    T = params.pop("T", 1)
+    recording = RecordingPolicy.from_config(params.pop("recording", None))
+    seed = params.pop("seed", seed)
+    specs = params.pop("variants")
+    if not specs:
+        raise ValueError(f"Comparison '{name}' has no variants.")
+
+    # Parameters outside 'variants' (num_bins, batch_size, ...) are shared by every variant
+    variants = {}
+    for spec in specs:
+        if spec["experiment"] not in EXPERIMENT_REGISTRY:
+            raise KeyError(f"Experiment '{spec['experiment']}' not found in registry.")
+        own = {k: v for k, v in spec.items() if k not in ("experiment", "label")}
+        variants[variant_label(spec)] = (spec["experiment"], {**params, **own})
+
+    root_seed = seed_sequence(seed)
+    print(f"Root seed entropy of {name}: {root_seed.entropy}")
+    seeds = trial_seeds(root_seed, T)
+    aggregator = PairedAggregator(params["num_bins"], list(variants))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            trials = pool.map(run_comparison_trial, [variants] * T, [recording] * T, seeds)
+            for t, (ns, gaps) in enumerate(trials, start=1):
+                aggregator.add_trial(ns, gaps)
+                print(f"Paired run {t}/{T} of {name}")
+    else:
+        for t in range(1, T + 1):
+            aggregator.add_trial(*run_comparison_trial(variants, recording, seeds[t - 1]))
+            print(f"Paired run {t}/{T} of {name}")
 
-    :param results_list: list of experiment results, where each result is a list of bin distributions over time
-    :param filename_base: base filename for saving plots
-    :param batch_size: number of balls added per step
+    comparison = aggregator.summary()
+    report_comparison(comparison, name)
+    plot_comparison(comparison, name)
+
+
+def report_comparison(comparison: PairedComparison, filename_base: str) -> None:
     """
-    num_experiments = len(results_list)
-    num_steps = len(results_list[0])
-    num_bins = len(results_list[0][0])
+    Print and save the mean paired differences at n = m and n = m^2 with 95% confidence intervals,
+    and how many independent trials per variant the same precision would have needed.
+    """
+    T = comparison.trials
+    reference = comparison.summaries[comparison.reference]
+    rows = []
+    print(f"Gap differences to {comparison.reference} over {T} paired trials:")
+    for label, difference in comparison.differences.items():
+        variant = comparison.summaries[label]
+        row = {"variant": label}
+        for point, index in (("m", None), ("m^2", -1)):
+            if index is None:
+                index = min(int(np.searchsorted(difference.ns, difference.num_bins)), len(difference.ns) - 1)
+            mean, std = difference.mean[index], difference.std[index]
+            half_width = 1.96 * std / np.sqrt(T) if T > 1 else float("nan")
+            # Independent runs would estimate the same difference with variance var(variant) + var(reference)
+            independent_var = variant.std[index] ** 2 + reference.std[index] ** 2
+            # With no spread in the paired differences the ratio is undefined, not infinite
+            factor = independent_var / std ** 2 if std > 0 else None
+            row[point] = {"mean": mean, "ci95": half_width, "std": std, "independent_trials_factor": factor}
+            saving = f"{factor:.1f}x the trials" if factor is not None else "n/a: the paired differences do not vary"
+            print(f"  {label} @ n = {point}: {mean:+.3f} ± {half_width:.3f} (independent runs would need {saving})")
+        rows.append(row)
+
+    with open(RESULTS_DIR / f"{filename_base}_paired.json", "w", encoding="utf-8") as f:
+        json.dump({"reference": comparison.reference, "trials": T, "differences": rows}, f, indent=2)
+
+
+def plot_comparison(comparison: PairedComparison, filename_base: str) -> None:
+    """Plot the mean paired gap difference of every variant against n, with its 95% confidence band."""
+    T = comparison.trials
+    plt.figure(figsize=(8, 5))
+    for label, difference in comparison.differences.items():
+        num_steps = len(difference.ns)
+        step_indices = range(0, num_steps, max(1, int(num_steps / difference.num_bins)))
+        x_vals = [difference.ns[i] for i in step_indices]
+        y_vals = np.array([difference.mean[i] for i in step_indices])
+        half_widths = 1.96 * np.array([difference.std[i] for i in step_indices]) / np.sqrt(max(T, 1))
+        plt.plot(x_vals, y_vals, label=label)
+        plt.fill_between(x_vals, y_vals - half_widths, y_vals + half_widths, alpha=0.2)
+
+    num_bins = comparison.summaries[comparison.reference].num_bins
+    plt.axhline(y=0, color='black', linewidth=0.8)
+    plt.axvline(x=num_bins, color='red', linestyle='--', label="n = m")
+    plt.axvline(x=num_bins ** 2, color='green', linestyle='--', label="n = m²")
+    plt.xlabel("Number of balls (n)")
+    plt.ylabel(f"Gap difference to {comparison.reference}")
+    plt.title(f"Paired gap differences ({T} trials, common random numbers)")
+    plt.grid(True)
+    plt.tight_layout()
+    plt.legend()
+    plt.savefig(RESULTS_DIR / f"{filename_base}_paired_differences.png")
+    plt.close()
+
 
-    # Compute average gap per n (number of balls)
-    average_gap_per_n: list[float] = []
-    std_gap_per_n: list[float] = []
-    for step in range(num_steps):
-        step_gaps = [max_gap(exp[step]) for exp in results_list]
-        average_gap_per_n.append(sum(step_gaps) / len(step_gaps))
-        std_gap_per_n.append(statistics.stdev(step_gaps))
+def plot_results(summary: GapSummary, filename_base: str, ylim: int = 10,
+                 prediction: GapSummary | None = None) -> None:
+    """
+    Plot results from multiple experiments.
 
-    # --- Compute gaps where n == m and n == m2 ---
-    gaps_where_n_equals_m: list[float] = []
-    gaps_where_n_equals_m2: list[float] = []
+    :param summary: cross-trial gap statistics per checkpoint
+    :param filename_base: base filename for saving plots
+    :param ylim: upper limit of the gap axis
+    :param prediction: analytic gap curve drawn over the average gap, if given
+    """
+    ns = summary.ns
+    num_steps = len(ns)
+    num_bins = summary.num_bins
 
-    for exp in results_list:
-        distro_m = bin_distro_where_n_equal_m(exp, batch_size)  # list of rows
-        gaps_where_n_equals_m.append(max_gap(distro_m))
+    # Average gap and its standard deviation per n (number of balls)
+    average_gap_per_n: list[float] = summary.mean
+    std_gap_per_n: list[float] = summary.std
 
-    for exp in results_list:
-        distro_m = exp[-1]  # n=m^2
-        gaps_where_n_equals_m2.append(max_gap(distro_m))
+    # --- Gaps where n == m and n == m2 ---
+    gaps_where_n_equals_m: list[float] = summary.gaps_at_m
+    gaps_where_n_equals_m2: list[float] = summary.gaps_at_m2
 
     # --- Plot average gap as trend line ---
     plt.figure(figsize=(8, 5))
     step_indices = range(0, num_steps, max(1, int(num_steps / num_bins)))  # plot every ~num_bins-th point
 
-    x_vals = [i * batch_size + 1 for i in step_indices]
+    x_vals = [ns[i] for i in step_indices]
     y_vals = [average_gap_per_n[i] for i in step_indices]
-    std_vals = [std_gap_per_n[i] for i in step_indices]  # <-- You must compute this list beforehand
+    std_vals = [std_gap_per_n[i] for i in step_indices]
 
     # Main line
     plt.plot(x_vals, y_vals, marker='o', label="Average Gap")
@@ -161,6 +539,9 @@ def plot_results(results_list: list[list[list[int]]], filename_base: str, batch_
     upper = [y_vals[i] + std_vals[i] for i in range(len(y_vals))]
     plt.fill_between(x_vals, lower, upper, alpha=0.2, label="Std Deviation")
 
+    if prediction is not None:
+        plt.plot(prediction.ns, prediction.mean, color='black', linestyle='-.', label="Fluid limit")
+
     plt.ylim(0, ylim)
 
     # Vertical lines
@@ -206,26 +587,43 @@ def plot_results(results_list: list[list[list[int]]], filename_base: str, batch_
 
 def main():
     args = parse_args()
+    if args.connect:
+        run_worker(parse_address(args.connect), run_remote_trial, args.workers)
+        return
+
     config = load_config(args.config)
     overrides = parse_param_overrides(args.param)
 
-    experiments = config["experiments"]
+    experiments = config.get("experiments") or {}
+    comparisons = config.get("comparisons") or {}
     os.makedirs(RESULTS_DIR, exist_ok=True)
 
     if args.experiment:
-        if args.experiment not in experiments:
+        if args.experiment not in experiments and args.experiment not in comparisons:
             raise ValueError(f"Experiment '{args.experiment}' not found in YAML.")
-        selected = {args.experiment: experiments[args.experiment]}
+        selected = {args.experiment: experiments[args.experiment]} if args.experiment in experiments else {}
+        comparisons = {args.experiment: comparisons[args.experiment]} if args.experiment in comparisons else {}
     else:
         selected = experiments
 
-    for exp_name, runs in selected.items():
-        if not isinstance(runs, list):
-            runs = [runs]
-        for run_idx, params in enumerate(runs, start=1):
-            merged = merge_overrides(params, overrides)
-            print(f"▶ Running {exp_name} (run {run_idx}) with params: {merged}")
-            run_experiment(exp_name, merged, f"{exp_name}_{run_idx}")
+    # Remote workers stay connected across experiments and are released when the coordinator closes
+    with TrialCoordinator(*parse_address(args.serve)) if args.serve else nullcontext() as coordinator:
+        if coordinator is not None:
+            print(f"Serving trials on {args.serve}")
+        for exp_name, runs in selected.items():
+            if not isinstance(runs, list):
+                runs = [runs]
+            for run_idx, params in enumerate(runs, start=1):
+                merged = merge_overrides(params, overrides)
+                print(f"▶ Running {exp_name} (run {run_idx}) with params: {merged}")
+                run_experiment(exp_name, merged, f"{exp_name}_{run_idx}", args.workers, args.seed,
+                               args.checkpoint_seconds, args.checkpoint_balls, args.resume, args.instrument,
+                               coordinator)
+
+    for name, params in comparisons.items():
+        merged = merge_overrides(params, overrides)
+        print(f"▶ Running comparison {name} with params: {merged}")
+        run_comparison(name, merged, args.workers, args.seed)
 
 
 if __name__ == "__main__":
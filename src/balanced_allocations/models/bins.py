@@ -1,5 +1,18 @@
 import random
-from typing import List
+from array import array
+from typing import Iterable, List
+
+import numpy as np
+
+
+class _RankTracker:
+    """Load of the bin at a fixed position `rank` of the sorted loads."""
+    __slots__ = ("rank", "level", "below")
+
+    def __init__(self, rank: int):
+        self.rank = rank
+        self.level = 0  # load at that position
+        self.below = 0  # number of bins with load < level
 
 
 class Bins:
@@ -7,13 +20,82 @@ class Bins:
     def __init__(self, n_bins: int):
         if n_bins <= 0:
             raise ValueError("Number of bins must be positive.")
-        self._bins = [0] * n_bins
+        # Typed storage: indexing yields plain ints, and _view exposes the same memory to NumPy
+        self._bins = array("q", bytes(8 * n_bins))
+        self._create_views()
+        self._total = 0
+
+        # Histogram of load levels: _level_counts[l] = number of bins with load l.
+        # Every ball moves one bin by one level, so the sorted positions used by the median
+        # and quartiles can be tracked in amortized O(1) per ball, up and (with departures) down.
+        self._level_counts = [n_bins]
+        mid = n_bins // 2
+        ranks = {
+            "median_low": mid - 1 if n_bins % 2 == 0 else mid,
+            "median_high": mid,
+            "q1": int(n_bins * 0.25),
+            "q3": (int(n_bins * 0.75) - 1) % n_bins,
+        }
+        self._trackers = {name: _RankTracker(rank) for name, rank in ranks.items()}
+
+    def _create_views(self) -> None:
+        self._view = np.frombuffer(self._bins, dtype=np.int64)
+        self._readonly_view = self._view.view()
+        self._readonly_view.flags.writeable = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Views cannot be pickled as views; they are rebuilt over the array on load
+        del state["_view"], state["_readonly_view"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_views()
 
     def add_ball(self, index: int) -> None:
-        self._bins[index] += 1
+        old = self._bins[index]
+        self._bins[index] = old + 1
+        self._total += 1
+        self._move(old, old + 1)
+        self._advance_trackers()
+
+    def add_balls(self, indices: Iterable[int]) -> None:
+        """Add one ball to each index (repeats allowed) as a single batch, in O(len(indices))."""
+        bins = self._bins
+        for index in indices:
+            old = bins[index]
+            bins[index] = old + 1
+            self._total += 1
+            self._move(old, old + 1)
+        self._advance_trackers()
+
+    def remove_ball(self, index: int) -> None:
+        """Take one ball out of a bin (dynamic models with departures)."""
+        old = self._bins[index]
+        if old == 0:
+            raise ValueError(f"Bin {index} is empty.")
+        self._bins[index] = old - 1
+        self._total -= 1
+        counts = self._level_counts
+        counts[old] -= 1
+        counts[old - 1] += 1
+        for tracker in self._trackers.values():
+            if tracker.level == old:
+                tracker.below += 1
+        self._retreat_trackers()
+        while counts[-1] == 0:  # keeps the top level non-empty for max_load()
+            counts.pop()
 
     def total_balls(self) -> int:
-        return sum(self._bins)
+        return self._total
+
+    def average_load(self) -> float:
+        return self._total / len(self._bins)
+
+    def max_load(self) -> int:
+        # The histogram ends at the highest load: empty top levels are dropped on removal
+        return len(self._level_counts) - 1
 
     def __getitem__(self, index: int) -> int:
         return self._bins[index]
@@ -21,25 +103,65 @@ class Bins:
     def __len__(self):
         return len(self._bins)
 
-    def distribution(self) -> List[int]:
-        return self._bins.copy()
+    def loads(self) -> array:
+        """The underlying typed array of loads, without copying. Callers must not modify it."""
+        return self._bins
+
+    def loads_at(self, indices: np.ndarray) -> np.ndarray:
+        """Loads of the bins at an array of indices (any shape)."""
+        return self._view[indices]
+
+    def distribution(self, copy: bool = True) -> List[int] | np.ndarray:
+        """
+        Loads of all bins: a list copy by default, or with copy=False a read-only
+        zero-copy NumPy view that follows later updates.
+        """
+        if copy:
+            return self._bins.tolist()
+        return self._readonly_view
 
     def median_load(self) -> float:
-        sorted_bins = sorted(self._bins)
-        n = len(sorted_bins)
-        mid = n // 2
-        if n % 2 == 1:
-            return sorted_bins[mid]
-        return (sorted_bins[mid - 1] + sorted_bins[mid]) / 2
+        low = self._trackers["median_low"].level
+        high = self._trackers["median_high"].level
+        if len(self._bins) % 2 == 1:
+            return high
+        return (low + high) / 2
 
     def quartile_thresholds(self) -> tuple[float, float]:
         """Return (Q1, Q3) thresholds based on 25% and 75% positions."""
-        sorted_bins = sorted(self._bins)
-        n = len(sorted_bins)
-        q1 = sorted_bins[int(n * 0.25)]
-        q3 = sorted_bins[int(n * 0.75) - 1]
-        return q1, q3
+        return self._trackers["q1"].level, self._trackers["q3"].level
+
+    def add_batch(self, batch_loads: list[int] | np.ndarray) -> None:
+        batch_loads = np.asarray(batch_loads, dtype=np.int64)
+        changed = np.flatnonzero(batch_loads)
+        for index, load in zip(changed.tolist(), batch_loads[changed].tolist()):
+            old = self._bins[index]
+            self._move(old, old + load)
+        self._view += batch_loads
+        self._total += int(batch_loads.sum())
+        self._advance_trackers()
+
+    def _move(self, old: int, new: int) -> None:
+        """Move one bin from load level `old` to `new` in the histogram."""
+        counts = self._level_counts
+        if new >= len(counts):
+            counts.extend([0] * (new - len(counts) + 1))
+        counts[old] -= 1
+        counts[new] += 1
+        for tracker in self._trackers.values():
+            if old < tracker.level <= new:
+                tracker.below -= 1
 
-    def add_batch(self, batch_loads: list[int]) -> None:
-        self._bins = [x + y for x, y in zip(self._bins, batch_loads)]
+    def _retreat_trackers(self) -> None:
+        counts = self._level_counts
+        for tracker in self._trackers.values():
+            while tracker.below > tracker.rank:
+                tracker.level -= 1
+                tracker.below -= counts[tracker.level]
 
+    def _advance_trackers(self) -> None:
+        counts = self._level_counts
+        for tracker in self._trackers.values():
+            while tracker.below + counts[tracker.level] <= tracker.rank:
+                tracker.below += counts[tracker.level]
+                tracker.level += 1
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class BinsMatrix:
+    """
+    The bins of `trials` independent runs stored as one (trials, m) load matrix.
+    Mirrors the Bins interface, with per-trial values where Bins returns scalars.
+    """
+    def __init__(self, trials: int, n_bins: int):
+        if trials <= 0:
+            raise ValueError("Number of trials must be positive.")
+        if n_bins <= 0:
+            raise ValueError("Number of bins must be positive.")
+        self.trials = trials
+        self._loads = np.zeros((trials, n_bins), dtype=np.int64)
+        self._balls = 0
+        self._sorted = None  # cached row-wise sorted loads for the order statistics
+
+    def add_batch(self, batch_loads: np.ndarray) -> None:
+        """Add a (trials, m) matrix of loads; every trial must receive the same number of balls."""
+        self._loads += batch_loads
+        self._balls += int(batch_loads[0].sum())
+        self._sorted = None
+
+    def total_balls(self) -> int:
+        """Balls placed in each trial."""
+        return self._balls
+
+    def __len__(self):
+        return self._loads.shape[1]
+
+    def distribution(self, copy: bool = True) -> np.ndarray:
+        return self._loads.copy() if copy else self._loads
+
+    def loads_at(self, indices: np.ndarray) -> np.ndarray:
+        """Loads at a (trials, ...) array of bin indices, each row indexing its own trial."""
+        flat = indices.reshape(self.trials, -1)
+        return np.take_along_axis(self._loads, flat, axis=-1).reshape(indices.shape)
+
+    def _sorted_loads(self) -> np.ndarray:
+        if self._sorted is None:
+            self._sorted = np.sort(self._loads, axis=1)
+        return self._sorted
+
+    def median_load(self) -> np.ndarray:
+        sorted_loads = self._sorted_loads()
+        n = len(self)
+        mid = n // 2
+        if n % 2 == 1:
+            return sorted_loads[:, mid]
+        return (sorted_loads[:, mid - 1] + sorted_loads[:, mid]) / 2
+
+    def quartile_thresholds(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return per-trial (Q1, Q3) thresholds based on 25% and 75% positions."""
+        sorted_loads = self._sorted_loads()
+        n = len(self)
+        return sorted_loads[:, int(n * 0.25)], sorted_loads[:, (int(n * 0.75) - 1) % n]
+
+    def gaps(self) -> np.ndarray:
+        """G_n of every trial."""
+        return self._loads.max(axis=1) - self._balls / len(self)
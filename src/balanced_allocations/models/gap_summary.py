@@ -0,0 +1,125 @@
+import bisect
+from dataclasses import dataclass
+
+import numpy as np
+
+from balanced_allocations.models.history import RunHistory
+
+
+@dataclass
+class GapSummary:
+    """Cross-trial gap statistics at each checkpoint, plus the gap samples the histograms need."""
+    num_bins: int
+    ns: list[int]
+    mean: list[float]
+    std: list[float]
+    gaps_at_m: list[float]
+    gaps_at_m2: list[float]
+
+
+class GapAggregator:
+    """
+    Streams the gaps of many trials into a GapSummary without keeping the trials.
+
+    Per checkpoint it keeps the running count, mean and sum of squared deviations
+    (Welford, or Chan's merge when several samples arrive at once), so its memory is
+    O(checkpoints) plus the gap samples at n = m and at the final n for the histograms.
+    Trials can be fed whole as they finish (`add_trial`, `add_history`) or checkpoint
+    by checkpoint as they run (`add_samples`).
+    """
+    def __init__(self, num_bins: int):
+        self.num_bins = num_bins
+        self.ns: list[int] = []
+        self._count = np.zeros(0)
+        self._mean = np.zeros(0)
+        self._m2 = np.zeros(0)
+        self.gaps_at_m: list[float] = []
+        self._last_samples: list[float] = []
+        self._gaps_at_end: list[float] = []
+        self._m_recorded = False
+
+    @property
+    def trials(self) -> int:
+        return int(self._count.max()) if len(self._count) else 0
+
+    def stats_at(self, n: int) -> tuple[int, float, float]:
+        """(trials, mean, sample std) of the gap at the first checkpoint with at least n balls."""
+        if not self.ns:
+            return 0, 0.0, 0.0
+        i = min(bisect.bisect_left(self.ns, n), len(self.ns) - 1)
+        count = int(self._count[i])
+        std = float(np.sqrt(self._m2[i] / (count - 1))) if count > 1 else 0.0
+        return count, float(self._mean[i]), std
+
+    def add_history(self, history: RunHistory) -> None:
+        self.add_trial(history.ns, history.gaps)
+
+    def add_trial(self, ns: list[int], gaps: list[float]) -> None:
+        """Add one complete trial, recorded at the checkpoints `ns`."""
+        if not self.ns:
+            self._extend(ns)
+        elif list(ns) != self.ns:
+            raise ValueError("All trials must be recorded at the same checkpoints.")
+
+        gaps = np.asarray(gaps, dtype=float)
+        self._count += 1
+        delta = gaps - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (gaps - self._mean)
+
+        m_index = min(bisect.bisect_left(self.ns, self.num_bins), len(self.ns) - 1)
+        self.gaps_at_m.append(float(gaps[m_index]))
+        self._gaps_at_end.append(float(gaps[-1]))
+
+    def add_samples(self, n: int, gaps: np.ndarray | list[float]) -> None:
+        """
+        Add the gaps of several trials at checkpoint n. Checkpoints must arrive in increasing
+        order; the samples at the last one are taken as the final gaps.
+        """
+        if not self.ns or n > self.ns[-1]:
+            self._extend([n])
+        elif n != self.ns[-1]:
+            raise ValueError("Checkpoints must be added in increasing order.")
+
+        gaps = np.asarray(gaps, dtype=float)
+        count_b = len(gaps)
+        if count_b == 0:
+            return
+        mean_b = float(gaps.mean())
+        m2_b = float(((gaps - mean_b) ** 2).sum())
+
+        i = len(self.ns) - 1
+        count_a = self._count[i]
+        count = count_a + count_b
+        delta = mean_b - self._mean[i]
+        self._mean[i] += delta * count_b / count
+        self._m2[i] += m2_b + delta ** 2 * count_a * count_b / count
+        self._count[i] = count
+
+        if not self._m_recorded and n >= self.num_bins:
+            self.gaps_at_m.extend(gaps.tolist())
+            self._m_recorded = True
+        self._last_samples = gaps.tolist()
+
+    def _extend(self, ns: list[int]) -> None:
+        self.ns.extend(ns)
+        pad = np.zeros(len(ns))
+        self._count = np.concatenate([self._count, pad])
+        self._mean = np.concatenate([self._mean, pad])
+        self._m2 = np.concatenate([self._m2, pad])
+
+    def summary(self) -> GapSummary:
+        if not self.ns:
+            raise ValueError("No gaps have been added.")
+        std = np.where(self._count > 1, np.sqrt(self._m2 / np.maximum(self._count - 1, 1)), 0.0)
+        # Trials fed checkpoint by checkpoint: the samples at n = m (or the last n) and at the end
+        gaps_at_m = self.gaps_at_m if self.gaps_at_m else list(self._last_samples)
+        gaps_at_m2 = self._gaps_at_end if self._gaps_at_end else list(self._last_samples)
+        return GapSummary(
+            num_bins=self.num_bins,
+            ns=list(self.ns),
+            mean=self._mean.tolist(),
+            std=std.tolist(),
+            gaps_at_m=list(gaps_at_m),
+            gaps_at_m2=list(gaps_at_m2),
+        )
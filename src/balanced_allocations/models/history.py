@@ -0,0 +1,319 @@
+import bisect
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+
+from balanced_allocations.models.bins import Bins
+from balanced_allocations.utils.bin_checker import max_gap
+from balanced_allocations.utils.instrumentation import RunStats
+
+
+class RunHistory(ABC):
+    """What one run recorded at its checkpoints (the values of n in `ns`)."""
+    def __init__(self, num_bins: int):
+        self.num_bins = num_bins
+        self.ns: List[int] = []
+        self.stats: RunStats | None = None  # set by instrumented runs
+
+    @abstractmethod
+    def record(self, n: int, bins: Bins) -> None:
+        """Called at every checkpoint with the current bins."""
+
+    def add_batch(self, choices: List[int]) -> None:
+        """Called after every batch with the bin chosen for each of its balls."""
+
+    @property
+    @abstractmethod
+    def gaps(self) -> List[float]:
+        """Gap at each checkpoint in `ns`."""
+
+    @abstractmethod
+    def distribution_at(self, n: int) -> List[int]:
+        """Bin distribution at the first checkpoint with at least n balls."""
+
+    @property
+    def snapshot_copies(self) -> int:
+        """Number of bin distributions copied into the history."""
+        return 0
+
+    def index_at(self, n: int) -> int:
+        """Index of the first record with at least n balls (the last record if there is none)."""
+        return min(bisect.bisect_left(self.ns, n), len(self.ns) - 1)
+
+    def gap_at(self, n: int) -> float:
+        return self.gaps[self.index_at(n)]
+
+    def __len__(self):
+        return len(self.ns)
+
+
+class SnapshotHistory(RunHistory):
+    """Bin distributions (or only their gaps) copied at every checkpoint."""
+    def __init__(self, num_bins: int, metrics_only: bool = False):
+        super().__init__(num_bins)
+        self.metrics_only = metrics_only
+        self._gaps: List[float] = []
+        self.distributions: List[np.ndarray] = []
+
+    @classmethod
+    def from_gaps(cls, num_bins: int, ns: List[int], gaps: List[float]) -> "SnapshotHistory":
+        """Metrics-only history of gaps recorded elsewhere, e.g. by a remote worker."""
+        history = cls(num_bins, metrics_only=True)
+        history.ns = list(ns)
+        history._gaps = list(gaps)
+        return history
+
+    def record(self, n: int, bins: Bins) -> None:
+        self.ns.append(n)
+        self._gaps.append(max_gap(bins))
+        if not self.metrics_only:
+            self.distributions.append(bins.distribution(copy=False).copy())
+
+    @property
+    def gaps(self) -> List[float]:
+        return self._gaps
+
+    @property
+    def snapshot_copies(self) -> int:
+        return len(self.distributions)
+
+    def distribution_at(self, n: int) -> List[int]:
+        if self.metrics_only:
+            raise ValueError("This history was recorded in metrics-only mode and holds no distributions.")
+        return self.distributions[self.index_at(n)].tolist()
+
+
+class EventLogHistory(RunHistory):
+    """
+    Lossless history storing only the bin chosen by every ball (2 or 4 bytes per ball)
+    plus the batch boundaries. Distributions and gaps are rebuilt on demand by replay.
+    """
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, num_bins: int, balls_end: int):
+        super().__init__(num_bins)
+        dtype = np.uint16 if num_bins <= np.iinfo(np.uint16).max + 1 else np.uint32
+        self.events = np.empty(balls_end, dtype=dtype)
+        self.balls = 0
+        self._batch_runs: List[List[int]] = []  # [batch size, number of consecutive batches of that size]
+        self._gaps: List[float] | None = None
+
+    def record(self, n: int, bins: Bins) -> None:
+        self.ns.append(n)
+        self._gaps = None
+
+    def add_batch(self, choices: List[int]) -> None:
+        size = len(choices)
+        self.events[self.balls:self.balls + size] = choices
+        self.balls += size
+        if self._batch_runs and self._batch_runs[-1][0] == size:
+            self._batch_runs[-1][1] += 1
+        else:
+            self._batch_runs.append([size, 1])
+
+    @property
+    def nbytes(self) -> int:
+        return self.events[:self.balls].nbytes
+
+    def batch_boundaries(self) -> np.ndarray:
+        """Number of balls placed at the end of every batch."""
+        if not self._batch_runs:
+            return np.zeros(0, dtype=np.int64)
+        sizes, counts = np.array(self._batch_runs, dtype=np.int64).T
+        return np.cumsum(np.repeat(sizes, counts))
+
+    def replay(self, n: int) -> np.ndarray:
+        """Bin distribution after exactly n balls."""
+        if not 0 <= n <= self.balls:
+            raise ValueError(f"n must be between 0 and {self.balls}.")
+        return np.bincount(self.events[:n], minlength=self.num_bins)
+
+    def iter_distributions(self, ns: List[int]) -> Iterator[np.ndarray]:
+        """Yield the distribution at each of the increasing values in ns, replaying the log once."""
+        loads = np.zeros(self.num_bins, dtype=np.int64)
+        previous = 0
+        for n in ns:
+            if n < previous:
+                raise ValueError("ns must be increasing.")
+            loads += np.bincount(self.events[previous:n], minlength=self.num_bins)
+            previous = n
+            yield loads.copy()
+
+    def iter_gaps(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """
+        Stream (n, G_n) for every ball, chunk by chunk.
+
+        Loads only grow, so the maximum load after n balls is the largest load any bin reached
+        right after receiving one of the first n balls. Within a chunk, that load is the bin's
+        load before the chunk plus the ball's rank among the chunk's balls going to the same bin.
+        """
+        loads = np.zeros(self.num_bins, dtype=np.int64)
+        running_max = 0
+        for start in range(0, self.balls, self.CHUNK_SIZE):
+            chunk = self.events[start:start + self.CHUNK_SIZE]
+            size = len(chunk)
+
+            order = np.argsort(chunk, kind="stable")
+            sorted_bins = chunk[order]
+            group_starts = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+            group_sizes = np.diff(np.r_[group_starts, size])
+            rank = np.arange(size) - np.repeat(group_starts, group_sizes)
+
+            load_after = np.empty(size, dtype=np.int64)
+            load_after[order] = loads[sorted_bins] + rank + 1
+
+            max_load = np.maximum(np.maximum.accumulate(load_after), running_max)
+            running_max = int(max_load[-1])
+            loads += np.bincount(chunk, minlength=self.num_bins)
+
+            ns = np.arange(start + 1, start + size + 1)
+            yield ns, max_load - ns / self.num_bins
+
+    @property
+    def gaps(self) -> List[float]:
+        if self._gaps is None:
+            self._gaps = self._gaps_at(self.ns)
+        return self._gaps
+
+    def _gaps_at(self, ns: List[int]) -> List[float]:
+        """Gaps at the increasing values in ns, in a single streaming pass."""
+        gaps = [0.0] * len(ns)
+        idx = 0
+        while idx < len(ns) and ns[idx] == 0:  # no balls, no gap
+            idx += 1
+        for chunk_ns, chunk_gaps in self.iter_gaps():
+            last = int(chunk_ns[-1])
+            while idx < len(ns) and ns[idx] <= last:
+                gaps[idx] = float(chunk_gaps[ns[idx] - int(chunk_ns[0])])
+                idx += 1
+        return gaps
+
+    def distribution_at(self, n: int) -> List[int]:
+        return self.replay(self.ns[self.index_at(n)]).tolist()
+
+
+class MemmapHistory(RunHistory):
+    """
+    Bin distributions written straight into a preallocated memory-mapped file, one row per
+    checkpoint, so the size of a history is limited by disk instead of RAM.
+
+    The file starts with a HEADER_SIZE-byte header (a magic line and JSON metadata), followed by
+    ns (int64, -1 until recorded), the gaps (float64) and the (rows, num_bins) loads. Integer loads
+    use the smallest unsigned type that holds balls_end. `MemmapHistory.open(path)` maps a file
+    read-only; `distributions` is then a zero-copy array that max_gap and NumPy work on directly.
+    """
+    MAGIC = b"BALANCED-ALLOCATIONS-HISTORY 1\n"
+    HEADER_SIZE = 4096
+
+    def __init__(self, path: str | Path, num_bins: int, rows: int, balls_end: int):
+        super().__init__(num_bins)
+        self.path = Path(path)
+        self.rows = rows
+        self.balls_end = balls_end
+        self.recorded = 0
+        self._ns: np.memmap | None = None  # the arrays exist once the first record sets the dtype
+        self._gaps: np.memmap | None = None
+        self._loads: np.memmap | None = None
+
+    @classmethod
+    def open(cls, path: str | Path, mode: str = "r") -> "MemmapHistory":
+        """Map an existing history file (read-only by default)."""
+        meta = cls._read_header(Path(path))
+        history = cls(path, meta["num_bins"], meta["rows"], meta["balls_end"])
+        history._map(mode)
+        recorded = np.flatnonzero(history._ns < 0)
+        history.recorded = int(recorded[0]) if recorded.size else history.rows
+        history.ns = history._ns[:history.recorded].tolist()
+        return history
+
+    def record(self, n: int, bins: Bins) -> None:
+        loads = bins.distribution(copy=False)
+        if self._loads is None:
+            self._create(np.asarray(loads).dtype)
+        i = self.recorded
+        if i >= self.rows:
+            raise ValueError(f"{self.path} has room for {self.rows} records only.")
+        self._loads[i] = loads
+        self._gaps[i] = max_gap(bins)
+        self._ns[i] = n  # written last: a row counts as recorded once its n is set
+        self.ns.append(n)
+        self.recorded += 1
+
+    def _create(self, load_dtype: np.dtype) -> None:
+        if load_dtype.kind == "f":
+            dtype = np.dtype(np.float64)
+        else:
+            dtype = next(np.dtype(t) for t in (np.uint16, np.uint32, np.uint64)
+                         if self.balls_end <= np.iinfo(t).max)
+        meta = {"num_bins": self.num_bins, "rows": self.rows, "balls_end": self.balls_end, "dtype": dtype.str}
+        header = self.MAGIC + json.dumps(meta).encode()
+        if len(header) >= self.HEADER_SIZE:
+            raise ValueError("History metadata does not fit in the header.")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "wb") as f:
+            f.write(header.ljust(self.HEADER_SIZE, b" "))
+            f.truncate(self.HEADER_SIZE + self.rows * (16 + self.num_bins * dtype.itemsize))
+        self._map("r+")
+        self._ns[:] = -1
+
+    @classmethod
+    def _read_header(cls, path: Path) -> dict:
+        with open(path, "rb") as f:
+            header = f.read(cls.HEADER_SIZE)
+        if not header.startswith(cls.MAGIC):
+            raise ValueError(f"{path} is not a memory-mapped history.")
+        return json.loads(header[len(cls.MAGIC):])
+
+    def _map(self, mode: str) -> None:
+        meta = self._read_header(self.path)
+        rows, num_bins = meta["rows"], meta["num_bins"]
+        offset = self.HEADER_SIZE
+        self._ns = np.memmap(self.path, np.int64, mode, offset=offset, shape=(rows,))
+        offset += rows * 8
+        self._gaps = np.memmap(self.path, np.float64, mode, offset=offset, shape=(rows,))
+        offset += rows * 8
+        self._loads = np.memmap(self.path, np.dtype(meta["dtype"]), mode, offset=offset, shape=(rows, num_bins))
+
+    def flush(self) -> None:
+        if self._loads is not None and self._loads.mode != "r":
+            for array in (self._loads, self._gaps, self._ns):
+                array.flush()
+
+    @property
+    def distributions(self) -> np.ndarray:
+        """(recorded, num_bins) zero-copy view of the recorded distributions."""
+        if self._loads is None:
+            return np.empty((0, self.num_bins))
+        return self._loads[:self.recorded]
+
+    @property
+    def gaps(self) -> List[float]:
+        if self._gaps is None:
+            return []
+        return self._gaps[:self.recorded].tolist()
+
+    @property
+    def snapshot_copies(self) -> int:
+        return self.recorded
+
+    def distribution_at(self, n: int) -> List[int]:
+        return self.distributions[self.index_at(n)].tolist()
+
+    # Checkpoints and worker processes pickle the file's location, not its contents
+    def __getstate__(self):
+        self.flush()
+        state = self.__dict__.copy()
+        state["_mapped"] = self._loads is not None
+        state["_mode"] = self._loads.mode if self._loads is not None else None
+        state["_ns"] = state["_gaps"] = state["_loads"] = None
+        return state
+
+    def __setstate__(self, state):
+        mapped, mode = state.pop("_mapped"), state.pop("_mode")
+        self.__dict__.update(state)
+        if mapped:
+            self._map(mode)
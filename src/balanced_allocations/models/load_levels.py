@@ -0,0 +1,109 @@
+import bisect
+from typing import Iterable, List
+
+import numpy as np
+
+
+class LoadLevels:
+    """
+    Loads of m exchangeable bins, stored only as the number of bins at each load level.
+
+    With uniform candidates and a selection rule that only looks at loads, which bin holds
+    which load does not matter, so a bin is identified by its position (rank) in the sorted
+    loads: a uniform bin index is a uniform rank, and the load at rank r is the first level
+    whose cumulative count exceeds r. The state spans only the levels between the minimum
+    and the maximum load (about the gap width) instead of one entry per bin.
+    """
+    def __init__(self, n_bins: int):
+        if n_bins <= 0:
+            raise ValueError("Number of bins must be positive.")
+        self._n_bins = n_bins
+        self._total = 0
+        self.base = 0  # lowest load any bin has
+        self._counts = [n_bins]  # _counts[i] = number of bins with load base + i
+        self._cumulative = [n_bins]  # _cumulative[i] = number of bins with load <= base + i
+
+    def __len__(self):
+        return self._n_bins
+
+    def __getitem__(self, rank: int) -> int:
+        """Load of the bin at position `rank` of the sorted loads."""
+        return self.base + bisect.bisect_right(self._cumulative, rank)
+
+    def loads(self) -> "LoadLevels":
+        """Indexable by rank like the loads of Bins; the levels themselves serve as the view."""
+        return self
+
+    def loads_at(self, ranks: np.ndarray) -> np.ndarray:
+        return self.base + np.searchsorted(np.asarray(self._cumulative), ranks, side="right")
+
+    def level_counts(self) -> List[int]:
+        """Number of bins at each load from `base` up to the maximum load."""
+        return list(self._counts)
+
+    def total_balls(self) -> int:
+        return self._total
+
+    def average_load(self) -> float:
+        return self._total / self._n_bins
+
+    def max_load(self) -> int:
+        # The top level only empties by creating a higher one, so it is never empty
+        return self.base + len(self._counts) - 1
+
+    def distribution(self, copy: bool = True) -> np.ndarray:
+        """The sorted loads (the only distribution exchangeable bins have). Always a new array."""
+        return np.repeat(np.arange(self.base, self.max_load() + 1), self._counts)
+
+    def median_load(self) -> float:
+        n = self._n_bins
+        mid = n // 2
+        if n % 2 == 1:
+            return self[mid]
+        return (self[mid - 1] + self[mid]) / 2
+
+    def quartile_thresholds(self) -> tuple[float, float]:
+        """Return (Q1, Q3) thresholds based on 25% and 75% positions."""
+        n = self._n_bins
+        return self[int(n * 0.25)], self[(int(n * 0.75) - 1) % n]
+
+    def add_ball(self, rank: int) -> None:
+        self._move(bisect.bisect_right(self._cumulative, rank), 1)
+        self._total += 1
+        self._trim()
+
+    def add_balls(self, ranks: Iterable[int]) -> None:
+        """
+        Add one ball to each rank (repeats allowed) as a single batch: all ranks refer to
+        the sorted loads before the batch, like the bin indices of Bins.add_balls.
+        """
+        ranks = np.asarray(ranks if isinstance(ranks, np.ndarray) else list(ranks), dtype=np.int64)
+        if ranks.size == 0:
+            return
+        unique, hits = np.unique(ranks, return_counts=True)
+        levels = np.searchsorted(np.asarray(self._cumulative), unique, side="right")
+        for level, k in zip(levels.tolist(), hits.tolist()):
+            self._move(level, k)
+        self._total += int(ranks.size)
+        self._trim()
+
+    def _move(self, level: int, k: int) -> None:
+        """Move one bin from level index `level` up by k."""
+        counts, cumulative = self._counts, self._cumulative
+        if level + k >= len(counts):
+            grow = level + k - len(counts) + 1
+            counts.extend([0] * grow)
+            cumulative.extend([self._n_bins] * grow)
+        counts[level] -= 1
+        counts[level + k] += 1
+        for i in range(level, level + k):
+            cumulative[i] -= 1
+
+    def _trim(self) -> None:
+        """Drop emptied levels at the bottom."""
+        empty = 0
+        while self._counts[empty] == 0:
+            empty += 1
+        if empty:
+            del self._counts[:empty], self._cumulative[:empty]
+            self.base += empty
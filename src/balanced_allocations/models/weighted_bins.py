@@ -0,0 +1,204 @@
+import heapq
+from array import array
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+from balanced_allocations.utils.ball_weights import BallWeights
+
+
+class _LoadRankTracker:
+    """
+    The load at one position (rank) of the sorted loads: the rank + 1 smallest loads sit in a
+    max-heap and the others in a min-heap, so the answer is the top of the first. Loads only grow:
+    a grown load is pushed again, its old entry goes stale and is dropped once it reaches the top,
+    and at most one pair of bins swaps heaps. O(log m) per ball.
+    """
+    def __init__(self, rank: int, loads: array, order: list[int]):
+        self.rank = rank
+        self._loads = loads
+        self._in_low = bytearray(len(loads))
+        for index in order[:rank + 1]:
+            self._in_low[index] = 1
+        self._low = [(-loads[index], index) for index in order[:rank + 1]]
+        self._high = [(loads[index], index) for index in order[rank + 1:]]
+        heapq.heapify(self._low)
+        heapq.heapify(self._high)
+
+    def _top_low(self) -> int:
+        low, loads, in_low = self._low, self._loads, self._in_low
+        while True:
+            negative_load, index = low[0]
+            if in_low[index] and loads[index] == -negative_load:
+                return index
+            heapq.heappop(low)
+
+    def _top_high(self) -> int | None:
+        high, loads, in_low = self._high, self._loads, self._in_low
+        while high:
+            load, index = high[0]
+            if not in_low[index] and loads[index] == load:
+                return index
+            heapq.heappop(high)
+        return None
+
+    def value(self) -> float:
+        return self._loads[self._top_low()]
+
+    def grow(self, index: int, load: float) -> None:
+        """Bin `index` now holds `load`, more than before."""
+        if not self._in_low[index]:
+            heapq.heappush(self._high, (load, index))
+        else:
+            heapq.heappush(self._low, (-load, index))
+            # Only this bin moved, so it is the only one that can have overtaken the high side
+            top, bottom = self._top_low(), self._top_high()
+            if bottom is not None and self._loads[top] > self._loads[bottom]:
+                heapq.heappop(self._low)
+                heapq.heappop(self._high)
+                self._in_low[top], self._in_low[bottom] = 0, 1
+                heapq.heappush(self._high, (self._loads[top], top))
+                heapq.heappush(self._low, (-self._loads[bottom], bottom))
+        if len(self._low) + len(self._high) > 3 * len(self._loads):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop the stale entries, which would otherwise pile up on bins that are never on top."""
+        loads, in_low = self._loads, self._in_low
+        self._low = [(l, i) for l, i in self._low if in_low[i] and loads[i] == -l]
+        self._high = [(l, i) for l, i in self._high if not in_low[i] and loads[i] == l]
+        heapq.heapify(self._low)
+        heapq.heapify(self._high)
+
+
+class WeightedBins:
+    """
+    Bins with capacities receiving balls with weights. The load of a bin is the weight it holds
+    divided by its capacity, so with unit weights and capacities it matches Bins.
+    Mirrors the Bins interface; the gap compares the maximum load with the average load
+    (total weight over total capacity).
+    """
+    def __init__(self, capacities: Sequence[float] | np.ndarray, weights: BallWeights | None = None):
+        capacities = np.asarray(capacities, dtype=float)
+        if capacities.size == 0:
+            raise ValueError("Number of bins must be positive.")
+        if np.any(capacities <= 0):
+            raise ValueError("Capacities must be positive.")
+        self.capacities = capacities
+        self._inverse = (1 / capacities).tolist()
+        self._inverse_view = 1 / capacities
+        self._total_capacity = float(capacities.sum())
+        self.weights = weights  # None means unit weights
+
+        self._bins = array("d", bytes(8 * capacities.size))
+        self._create_views()
+        self._balls = 0
+        self._weight = 0.0
+        self._max = 0.0  # loads only grow, so a running maximum is exact
+
+        # Positions of the sorted loads behind the median and quartiles (as in Bins), tracked
+        # ball by ball once a threshold has been asked for
+        n = capacities.size
+        mid = n // 2
+        self._ranks = {
+            "median_low": mid - 1 if n % 2 == 0 else mid,
+            "median_high": mid,
+            "q1": int(n * 0.25),
+            "q3": (int(n * 0.75) - 1) % n,
+        }
+        self._trackers: dict[int, _LoadRankTracker] | None = None
+
+    def _create_views(self) -> None:
+        self._view = np.frombuffer(self._bins, dtype=np.float64)
+        self._readonly_view = self._view.view()
+        self._readonly_view.flags.writeable = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_view"], state["_readonly_view"]
+        state["_trackers"] = None  # rebuilt on the next threshold query
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_views()
+
+    def add_ball(self, index: int) -> None:
+        self.add_balls((index,))
+
+    def add_balls(self, indices: Iterable[int]) -> None:
+        """Add one ball to each index (repeats allowed), drawing each ball's weight."""
+        bins, inverse = self._bins, self._inverse
+        draw = self.weights.next if self.weights is not None else None
+        trackers = self._trackers.values() if self._trackers is not None else ()
+        for index in indices:
+            weight = draw() if draw is not None else 1.0
+            old = bins[index]
+            load = old + weight * inverse[index]
+            bins[index] = load
+            if load > self._max:
+                self._max = load
+            if load != old:
+                for tracker in trackers:
+                    tracker.grow(index, load)
+            self._weight += weight
+            self._balls += 1
+
+    def add_batch(self, batch_counts: list[int] | np.ndarray) -> None:
+        """Add batch_counts[i] balls to bin i, each with its own weight."""
+        batch_counts = np.asarray(batch_counts, dtype=np.int64)
+        changed = np.flatnonzero(batch_counts)
+        targets = np.repeat(changed, batch_counts[changed])
+        weights = self.weights.draw(len(targets)) if self.weights is not None else np.ones(len(targets))
+        self._view[changed] += (np.bincount(targets, weights=weights, minlength=len(self))[changed]
+                                * self._inverse_view[changed])
+        if len(changed):
+            self._max = max(self._max, float(self._view[changed].max()))
+        self._weight += float(weights.sum())
+        self._balls += len(targets)
+        self._trackers = None  # a whole batch moved: rebuilt from one sort on the next query
+
+    def total_balls(self) -> int:
+        return self._balls
+
+    def total_weight(self) -> float:
+        return self._weight
+
+    def average_load(self) -> float:
+        return self._weight / self._total_capacity
+
+    def max_load(self) -> float:
+        return self._max
+
+    def __getitem__(self, index: int) -> float:
+        return self._bins[index]
+
+    def __len__(self):
+        return len(self._bins)
+
+    def loads(self) -> array:
+        """The underlying typed array of loads, without copying. Callers must not modify it."""
+        return self._bins
+
+    def loads_at(self, indices: np.ndarray) -> np.ndarray:
+        return self._view[indices]
+
+    def distribution(self, copy: bool = True) -> List[float] | np.ndarray:
+        if copy:
+            return self._bins.tolist()
+        return self._readonly_view
+
+    # Real-valued loads have no level histogram: the thresholds come from rank trackers, built
+    # from one sort and then updated ball by ball in O(log m).
+    def _load_at(self, name: str) -> float:
+        if self._trackers is None:
+            order = np.argsort(self._view, kind="stable").tolist()
+            self._trackers = {rank: _LoadRankTracker(rank, self._bins, order) for rank in set(self._ranks.values())}
+        return self._trackers[self._ranks[name]].value()
+
+    def median_load(self) -> float:
+        return (self._load_at("median_low") + self._load_at("median_high")) / 2
+
+    def quartile_thresholds(self) -> tuple[float, float]:
+        """Return (Q1, Q3) thresholds based on 25% and 75% positions."""
+        return self._load_at("q1"), self._load_at("q3")
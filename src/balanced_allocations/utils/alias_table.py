@@ -0,0 +1,40 @@
+import numpy as np
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table: samples index i with probability weights[i] / sum(weights)
+    in O(1) per draw (one uniform column, one uniform float) after an O(m) setup.
+    """
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        if weights.ndim != 1 or weights.size == 0:
+            raise ValueError("weights must be a non-empty 1-D sequence.")
+        if not np.all(np.isfinite(weights)) or np.any(weights <= 0):
+            raise ValueError("weights must be positive and finite.")
+
+        n = weights.size
+        scaled = (weights * n / weights.sum()).tolist()
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        # Pair every under-full column with an over-full one that tops it up to 1
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1 - scaled[s]
+            (small if scaled[l] < 1 else large).append(l)
+        # Whatever is left is full up to rounding error
+
+        self.prob = np.array(prob)
+        self.alias = np.array(alias, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng: np.random.Generator, size: int | tuple[int, ...]) -> np.ndarray:
+        columns = rng.integers(len(self.prob), size=size)
+        keep = rng.random(size) < self.prob[columns]
+        return np.where(keep, columns, self.alias[columns])
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class BallWeights:
+    """
+    Weights of the arriving balls, drawn i.i.d. from a distribution of numpy.random.Generator
+    (e.g. "exponential" with scale, "lognormal" with mean and sigma, "uniform" with low and high),
+    or "constant" with value. Scalar draws come from pre-generated blocks like RandomBuffer.
+    """
+    DISTRIBUTIONS = ("constant", "exponential", "uniform", "lognormal", "pareto", "gamma")
+
+    def __init__(self, rng: np.random.Generator, distribution: str = "constant", block_size: int = 1 << 16,
+                 **params):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Invalid weight distribution '{distribution}'. Expected one of {self.DISTRIBUTIONS}.")
+        if block_size <= 0:
+            raise ValueError("block_size must be positive.")
+        self._rng = rng
+        self.distribution = distribution
+        self.params = params
+        self.block_size = block_size
+        self._block: list[float] = []
+        self._pos = 0
+        # Fail on bad parameters now rather than in the middle of a run
+        if np.any(self.draw(1) <= 0):
+            raise ValueError("Ball weights must be positive.")
+
+    @classmethod
+    def from_config(cls, cfg: dict | float, rng: np.random.Generator) -> "BallWeights":
+        """Build from the 'ball_weights' entry of an experiment: a mapping, or a number for constant weights."""
+        if isinstance(cfg, (int, float)):
+            return cls(rng, "constant", value=float(cfg))
+        return cls(rng, **cfg)
+
+    def draw(self, k: int) -> np.ndarray:
+        """k weights as an array."""
+        if self.distribution == "constant":
+            return np.full(k, float(self.params.get("value", 1.0)))
+        return getattr(self._rng, self.distribution)(size=k, **self.params)
+
+    def next(self) -> float:
+        if self._pos == len(self._block):
+            self._block = self.draw(self.block_size).tolist()
+            self._pos = 0
+        self._pos += 1
+        return self._block[self._pos - 1]
@@ -1,28 +1,43 @@
+from typing import TYPE_CHECKING
 
+import numpy as np
 
-def max_gap(bins: list[int]) -> float:
+from balanced_allocations.models.bins import Bins
+from balanced_allocations.models.load_levels import LoadLevels
+from balanced_allocations.models.weighted_bins import WeightedBins
+
+if TYPE_CHECKING:
+    from balanced_allocations.models.history import RunHistory
+
+
+def max_gap(bins: Bins | LoadLevels | WeightedBins | list[int] | np.ndarray) -> float | np.ndarray:
     """
     Compute the gap G_n = max_i (X_i - n/m)
 
-    :param bins: list of counts of balls in each bin
-    :return: the gap as a float
+    For WeightedBins the loads are normalized by capacity and n/m becomes the
+    average load, total weight / total capacity.
+
+    :param bins: Bins, LoadLevels or WeightedBins (answered in O(1) from their counters),
+                 counts of balls in each bin, or a (steps, m) array of such counts, e.g.
+                 the zero-copy distributions of a MemmapHistory
+    :return: the gap as a float, or the gap of every row of a 2-D array
     """
-    n = sum(bins)  # total number of balls
-    m = len(bins)  # total number of bins
+    if isinstance(bins, (Bins, LoadLevels, WeightedBins)):
+        return bins.max_load() - bins.average_load()
+    loads = np.asarray(bins)
+    if loads.ndim == 2:
+        # Row reductions stream through a memory-mapped file without copying it
+        return loads.max(axis=1) - loads.sum(axis=1) / loads.shape[1]
+    n = loads.sum()  # total number of balls
+    m = loads.size  # total number of bins
     avg = n / m  # expected load per bin
-    return max(x - avg for x in bins)
+    return float(loads.max() - avg)
 
 
-def bin_distro_where_n_equal_m(results: list[list[int]], batch_size: int = 1) -> list[int]:
+def bin_distro_where_n_equal_m(history: "RunHistory") -> list[int]:
     """
-    Extract the bin distribution at the step where n == m.
-    :param results: list of bin distributions over time
-    :param batch_size: number of balls added per step
-    :return: bin distribution when n == m
+    Extract the bin distribution at the first checkpoint where n >= m.
+    :param history: recorded history of one run
+    :return: bin distribution when n == m (the last recorded one if the run never reached m)
     """
-    m = len(results[0])  # number of bins
-    step_index = m // batch_size  # index where n == m
-    if step_index < len(results):
-        return results[step_index]
-    else:
-        return results[-1]  # fallback to last step if index out of bounds
\ No newline at end of file
+    return history.distribution_at(history.num_bins)
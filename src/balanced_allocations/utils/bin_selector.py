@@ -1,75 +1,213 @@
 import random
-from typing import Iterable
+import time
+from typing import Sequence
+
+import numpy as np
 
 from balanced_allocations.models.bins import Bins
-from balanced_allocations.utils.bin_inspector import BinInspector
+from balanced_allocations.utils.instrumentation import CountingRandom, CountingThresholds, RunStats
+from balanced_allocations.utils.random_buffer import RandomBuffer
 
 
 class BinSelector:
     """Chooses bins using 'absolute', 'partial_k1', or 'partial_k2' modes."""
-
-    def __init__(self, bins: Bins, mode: str = "absolute"):
+    MODES = ("absolute", "partial_k1", "partial_k2")
+    def __init__(self, bins: Bins, mode: str = "absolute", rng: random.Random | RandomBuffer | None = None):
         self._bins = bins
-        self.inspector = BinInspector(bins)
+        self._thresholds = bins  # where the median and quartiles are asked for
+        self._random = rng or random  # the module itself when no generator is given
 
-        if mode not in ["absolute", "partial_k1", "partial_k2"]:
+        if mode not in self.MODES:
             raise ValueError("Invalid mode")
 
         self.mode = mode
+        # The selection kernel is picked once instead of dispatching on the mode per comparison
+        self._kernel = {
+            "absolute": self._choose_absolute,
+            "partial_k1": self._choose_partial_k1,
+            "partial_k2": self._choose_partial_k2,
+        }[mode]
+        self._plain_kernel = self._kernel
+        self._plain_random = self._random
+        self.stats: RunStats | None = None
+
+    def instrument(self, stats: RunStats | None) -> None:
+        """
+        Count comparisons, random tie-breaks, threshold computations and selection time into
+        `stats`, or stop counting with None. Uninstrumented selectors run the plain kernels.
+        """
+        self.stats = stats
+        if stats is None:
+            self._kernel, self._random, self._thresholds = self._plain_kernel, self._plain_random, self._bins
+        else:
+            self._kernel, self._random = self._instrumented_kernel, CountingRandom(self._plain_random, stats)
+            self._thresholds = CountingThresholds(self._bins, stats)
+
+    def _instrumented_kernel(self, candidates: Sequence[int], start: int, stop: int) -> int:
+        stats = self.stats
+        began = time.perf_counter()
+        winner = self._plain_kernel(candidates, start, stop)
+        stats.times["selection"] += time.perf_counter() - began
+        stats.counters["comparisons"] += stop - start - 1
+        return winner
+
+    def choose_bin(self, candidates: Sequence[int], start: int = 0, stop: int | None = None) -> int:
+        """
+        Select one of the candidates[start:stop] (sampled with replacement) according to mode.
+        The candidates are read in place, so a preallocated buffer can be passed without slicing.
+        Candidates with the same score are equally likely to win.
+        """
+        return self._kernel(candidates, start, len(candidates) if stop is None else stop)
+
+    # --------------------------
+    # Selection kernels
+    # --------------------------
+    # Each kernel streams over the candidates keeping the best score seen and a reservoir
+    # sample of one among the candidates tied at that score: the k-th tie replaces the
+    # current winner with probability 1/k, which picks uniformly among ties without shuffling.
+
+    def _choose_absolute(self, candidates: Sequence[int], start: int, stop: int) -> int:
+        """Least loaded candidate."""
+        loads = self._bins.loads()
+        winner = candidates[start]
+        best = loads[winner]
+        ties = 1
+        for i in range(start + 1, stop):
+            c = candidates[i]
+            load = loads[c]
+            if load < best:
+                winner, best, ties = c, load, 1
+            elif load == best:
+                ties += 1
+                if self._random.random() * ties < 1:
+                    winner = c
+        return winner
+
+    def _choose_partial_k1(self, candidates: Sequence[int], start: int, stop: int) -> int:
+        """Prefer candidates at or below the median; no other information."""
+        loads = self._bins.loads()
+        median = self._thresholds.median_load()
+        winner = candidates[start]
+        best = loads[winner] > median
+        ties = 1
+        for i in range(start + 1, stop):
+            c = candidates[i]
+            above = loads[c] > median
+            if above < best:
+                winner, best, ties = c, above, 1
+            elif above == best:
+                ties += 1
+                if self._random.random() * ties < 1:
+                    winner = c
+        return winner
+
+    def _choose_partial_k2(self, candidates: Sequence[int], start: int, stop: int) -> int:
+        """
+        Prefer by threshold class: below the median, bottom 25% (<= Q1) beats top 75%;
+        above the median, below Q3 beats top 25%.
+        """
+        loads = self._bins.loads()
+        median = self._thresholds.median_load()
+        q1, q3 = self._thresholds.quartile_thresholds()
+
+        def threshold_class(load: int) -> int:
+            if load > median:
+                return 3 if load >= q3 else 2
+            return 1 if load > q1 else 0
+
+        winner = candidates[start]
+        best = threshold_class(loads[winner])
+        ties = 1
+        for i in range(start + 1, stop):
+            c = candidates[i]
+            cls = threshold_class(loads[c])
+            if cls < best:
+                winner, best, ties = c, cls, 1
+            elif cls == best:
+                ties += 1
+                if self._random.random() * ties < 1:
+                    winner = c
+        return winner
 
     # --------------------------
-    # Core pairwise comparison
+    # Keyed selection
     # --------------------------
-    def _compare_pair(self, a: int, b: int) -> int:
-        """Compare two bins according to mode, return chosen index."""
-        if a == b:
-            return a
+    # Instead of drawing tie-breaks, every candidate comes with a uniform key and the smallest
+    # key wins among the best scores. Runs fed the same candidates and keys then also share
+    # their tie-breaks (common random numbers), whatever their mode.
+
+    def choose_bin_keyed(self, candidates: Sequence[int], keys: Sequence[float], start: int = 0,
+                         stop: int | None = None) -> int:
+        """choose_bin with the ties among candidates[start:stop] decided by keys[start:stop]."""
+        stop = len(candidates) if stop is None else stop
+        score = self._score_function()
+        loads = self._bins.loads()
+        winner = candidates[start]
+        best = (score(loads[winner]), keys[start])
+        for i in range(start + 1, stop):
+            c = candidates[i]
+            current = (score(loads[c]), keys[i])
+            if current < best:
+                winner, best = c, current
+        return winner
 
+    def _score_function(self):
+        """Score of a load under the current mode and thresholds: lower is preferred."""
         if self.mode == "absolute":
-            la, lb = self.inspector.absolute(a), self.inspector.absolute(b)
-            if la < lb:
-                return a
-            if lb < la:
-                return b
-            return random.choice((a, b))
-
-        elif self.mode == "partial_k1":
-            a_above = self.inspector.above_median(a)
-            b_above = self.inspector.above_median(b)
-            if a_above != b_above:
-                return a if not a_above else b
-            return random.choice((a, b))
-
-        elif self.mode == "partial_k2":
-            a_above = self.inspector.above_median(a)
-            b_above = self.inspector.above_median(b)
-
-            if a_above != b_above:
-                return a if not a_above else b
-
-            # both below median → ask top 75%
-            if not a_above and not b_above:
-                a_top75 = self.inspector.in_top_75(a)
-                b_top75 = self.inspector.in_top_75(b)
-                if a_top75 != b_top75:
-                    return a if not a_top75 else b
-                return random.choice((a, b))
-
-            # both above median → ask top 25%
-            a_top25 = self.inspector.in_top_25(a)
-            b_top25 = self.inspector.in_top_25(b)
-            if a_top25 != b_top25:
-                return a if not a_top25 else b
-            return random.choice((a, b))
+            return lambda load: load
+        median = self._thresholds.median_load()
+        if self.mode == "partial_k1":
+            return lambda load: load > median
+        q1, q3 = self._thresholds.quartile_thresholds()
+        return lambda load: (3 if load >= q3 else 2) if load > median else (1 if load > q1 else 0)
 
-        else:
-            raise ValueError(f"Unknown mode '{self.mode}'")
-
-    def choose_bin(self, candidates: Iterable[int]) -> int:
-        """Sample n bins (with replacement) and select one according to mode."""
-        cand = list(candidates)
-        random.shuffle(cand)  # With this, all the bins with same score should have same probabilities
-        winner = cand[0]
-        for c in cand[1:]:
-            winner = self._compare_pair(winner, c)
-        return winner
\ No newline at end of file
+    # --------------------------
+    # Vectorized batch selection
+    # --------------------------
+    def _scores(self, candidate_loads: np.ndarray) -> np.ndarray:
+        """Rank of each candidate load under the current mode: lower is preferred, equal means tie."""
+        if self.mode == "absolute":
+            return candidate_loads
+
+        # Thresholds are scalars for Bins and one per trial for BinsMatrix
+        median = self._per_row(self._thresholds.median_load())
+        above_median = candidate_loads > median
+        if self.mode == "partial_k1":
+            return above_median.astype(np.int64)
+
+        # partial_k2: below median splits on Q1 (top 75%), above median on Q3 (top 25%)
+        q1, q3 = (self._per_row(q) for q in self._thresholds.quartile_thresholds())
+        return np.where(above_median, 2 + (candidate_loads >= q3), candidate_loads > q1).astype(np.int64)
+
+    @staticmethod
+    def _per_row(value) -> np.ndarray:
+        """Reshape a threshold so it broadcasts over the (balls, d) axes of the candidates."""
+        value = np.asarray(value)
+        return value.reshape(value.shape + (1, 1))
+
+    def choose_bins(self, candidates: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Vectorized choose_bin for a (balls, d) array of candidates, or a (trials, balls, d) array
+        when the bins are a BinsMatrix, all judged against the current bins.
+        Ties are broken uniformly at random among the tied candidates.
+        """
+        return self.choose_bins_keyed(candidates, rng.random(candidates.shape))
+
+    def choose_bins_keyed(self, candidates: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """choose_bins with the ties decided by an array of uniform keys shaped like the candidates."""
+        began = time.perf_counter() if self.stats is not None else 0.0
+        candidate_loads = self._bins.loads_at(candidates)
+
+        # Among the candidates with the best score, the one with the smallest uniform key wins
+        scores = self._scores(candidate_loads)
+        best = scores.min(axis=-1, keepdims=True)
+        tied = scores == best
+        winners = np.argmin(np.where(tied, keys, 2.0), axis=-1)
+        chosen = np.take_along_axis(candidates, winners[..., None], axis=-1)[..., 0]
+
+        if self.stats is not None:
+            stats = self.stats
+            stats.counters["comparisons"] += chosen.size * (candidates.shape[-1] - 1)
+            stats.counters["random_tie_breaks"] += int((tied.sum(axis=-1) > 1).sum())
+            stats.times["selection"] += time.perf_counter() - began
+        return chosen
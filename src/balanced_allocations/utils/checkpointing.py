@@ -0,0 +1,52 @@
+import os
+import pickle
+import time
+from pathlib import Path
+
+
+class RunCheckpointer:
+    """
+    Saves the state of one run to `path` every `every_seconds` seconds and/or every
+    `every_balls` balls, so that a crashed or preempted run can be resumed.
+    Files are written atomically: a crash while saving leaves the previous checkpoint intact.
+    """
+    def __init__(self, path: str | Path, every_seconds: float | None = None, every_balls: int | None = None,
+                 resume: bool = False):
+        if every_seconds is not None and every_seconds <= 0:
+            raise ValueError("every_seconds must be positive.")
+        if every_balls is not None and every_balls <= 0:
+            raise ValueError("every_balls must be positive.")
+        self.path = Path(path)
+        self.every_seconds = every_seconds
+        self.every_balls = every_balls
+        self.resume = resume
+        self._last_time = time.monotonic()
+        self._last_balls = 0
+
+    def start(self, balls_placed: int) -> None:
+        """Restart the intervals, at the beginning of a (possibly resumed) run."""
+        self._last_time = time.monotonic()
+        self._last_balls = balls_placed
+
+    def due(self, balls_placed: int) -> bool:
+        if self.every_balls is not None and balls_placed - self._last_balls >= self.every_balls:
+            return True
+        return self.every_seconds is not None and time.monotonic() - self._last_time >= self.every_seconds
+
+    def save(self, state: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._last_time = time.monotonic()
+        self._last_balls = state.get("balls_placed", self._last_balls)
+
+    def load(self) -> dict | None:
+        """Last saved state, or None when not resuming or nothing was saved yet."""
+        if not self.resume or not self.path.exists():
+            return None
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
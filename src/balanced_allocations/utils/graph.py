@@ -0,0 +1,132 @@
+import math
+
+import numpy as np
+
+
+class Graph:
+    """
+    Undirected graph on the bins in CSR form: the neighbours of vertex v are
+    indices[indptr[v]:indptr[v + 1]]. Every edge is stored in both directions, so a uniform
+    position in `indices` is a uniform edge, seen from a uniform one of its endpoints; `sources`
+    holds the other endpoint of every position. Neighbour and edge draws are O(1) array lookups,
+    vectorized over any number of balls.
+    """
+    TOPOLOGIES = ("ring", "torus", "random_regular")
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray):
+        indptr = np.asarray(indptr, dtype=np.int64)
+        if indptr.ndim != 1 or indptr.size < 2 or indptr[0] != 0 or np.any(np.diff(indptr) < 0):
+            raise ValueError("indptr must be a non-decreasing array starting at 0.")
+        self.num_vertices = indptr.size - 1
+        dtype = np.int32 if self.num_vertices <= np.iinfo(np.int32).max else np.int64
+        self.indptr = indptr
+        self.indices = np.asarray(indices, dtype=dtype)
+        if self.indices.size != indptr[-1]:
+            raise ValueError("indices must hold indptr[-1] entries.")
+        if self.indices.size and (self.indices.min() < 0 or self.indices.max() >= self.num_vertices):
+            raise ValueError("indices must be vertices of the graph.")
+        self.degrees = np.diff(indptr)
+        if np.any(self.degrees == 0):
+            raise ValueError("Every vertex needs at least one neighbour.")
+        self.sources = np.repeat(np.arange(self.num_vertices, dtype=dtype), self.degrees)
+        # Regular graphs locate a vertex's neighbours by arithmetic alone
+        self.degree = int(self.degrees[0]) if np.all(self.degrees == self.degrees[0]) else None
+
+    @classmethod
+    def from_edges(cls, num_vertices: int, sources: np.ndarray, targets: np.ndarray) -> "Graph":
+        """Graph with an undirected edge between sources[i] and targets[i] for every i."""
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        heads = np.concatenate((sources, targets))
+        tails = np.concatenate((targets, sources))
+        order = np.argsort(heads, kind="stable")
+        indptr = np.zeros(num_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=num_vertices), out=indptr[1:])
+        return cls(indptr, tails[order])
+
+    @classmethod
+    def ring(cls, n: int, k: int = 1) -> "Graph":
+        """Cycle on n vertices, each joined to the k nearest vertices on either side."""
+        if not 1 <= k < n / 2:
+            raise ValueError("A ring needs 1 <= k < n / 2.")
+        offsets = np.concatenate((np.arange(-k, 0), np.arange(1, k + 1)))
+        indices = (np.arange(n)[:, None] + offsets) % n
+        return cls(np.arange(n + 1, dtype=np.int64) * 2 * k, indices.ravel())
+
+    @classmethod
+    def torus(cls, rows: int, cols: int) -> "Graph":
+        """rows x cols grid with wrap-around, each vertex joined to its four grid neighbours."""
+        if rows < 3 or cols < 3:
+            raise ValueError("A torus needs at least 3 rows and 3 columns.")
+        r, c = np.divmod(np.arange(rows * cols), cols)
+        indices = np.stack((
+            ((r - 1) % rows) * cols + c,
+            ((r + 1) % rows) * cols + c,
+            r * cols + (c - 1) % cols,
+            r * cols + (c + 1) % cols,
+        ), axis=1)
+        return cls(np.arange(rows * cols + 1, dtype=np.int64) * 4, indices.ravel())
+
+    @classmethod
+    def random_regular(cls, n: int, degree: int, rng: np.random.Generator) -> "Graph":
+        """
+        Random degree-regular simple graph from the configuration model: the n * degree edge
+        stubs are paired at random, and the stubs of self-loops and repeated edges are paired
+        again together with as many random good pairs until none is left.
+        """
+        if not 1 <= degree < n or (n * degree) % 2:
+            raise ValueError("A random regular graph needs 1 <= degree < n and n * degree even.")
+        pairs = rng.permutation(np.repeat(np.arange(n, dtype=np.int64), degree)).reshape(-1, 2)
+        for _ in range(1000):
+            low, high = pairs.min(axis=1), pairs.max(axis=1)
+            keys = low * n + high
+            _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+            repeated = np.ones(len(pairs), dtype=bool)
+            repeated[first] = False  # the first copy of every edge is kept
+            bad = (low == high) | repeated
+            if not bad.any():
+                return cls.from_edges(n, pairs[:, 0], pairs[:, 1])
+            good = np.flatnonzero(~bad)
+            redo = np.concatenate((np.flatnonzero(bad),
+                                   rng.choice(good, size=min(len(good), int(bad.sum())), replace=False)))
+            pairs[redo] = rng.permutation(pairs[redo].ravel()).reshape(-1, 2)
+        raise RuntimeError("Could not pair the stubs into a simple graph.")
+
+    @classmethod
+    def from_config(cls, cfg: dict, num_vertices: int, rng: np.random.Generator) -> "Graph":
+        """
+        Build the 'graph' entry of an experiment on `num_vertices` bins:
+        ring (k), torus (rows; cols = num_vertices / rows) or random_regular (degree).
+        """
+        cfg = dict(cfg)
+        topology = cfg.pop("topology", None)
+        if topology not in cls.TOPOLOGIES:
+            raise ValueError(f"Invalid graph topology '{topology}'. Expected one of {cls.TOPOLOGIES}.")
+        if topology == "ring":
+            return cls.ring(num_vertices, **cfg)
+        if topology == "torus":
+            rows = cfg.pop("rows", math.isqrt(num_vertices))
+            if num_vertices % rows:
+                raise ValueError(f"A torus of {num_vertices} vertices cannot have {rows} rows.")
+            return cls.torus(rows, num_vertices // rows, **cfg)
+        return cls.random_regular(num_vertices, rng=rng, **cfg)
+
+    def __len__(self):
+        return self.num_vertices
+
+    @property
+    def num_edges(self) -> int:
+        return self.indices.size // 2
+
+    def neighbors(self, v: int) -> np.ndarray:
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+    def random_neighbors(self, vertices: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+        """A neighbour of each vertex, picked by a uniform float in [0, 1) per vertex (same shape)."""
+        if self.degree is not None:
+            return self.indices[vertices * self.degree + (uniforms * self.degree).astype(np.int64)]
+        return self.indices[self.indptr[vertices] + (uniforms * self.degrees[vertices]).astype(np.int64)]
+
+    def edge_endpoints(self, positions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """The two endpoints of the edges stored at positions of `indices`."""
+        return self.sources[positions], self.indices[positions]
@@ -0,0 +1,76 @@
+class RunStats:
+    """
+    Counters and per-phase wall-clock times of one run, filled in when a run is instrumented.
+
+    Counters:
+      - comparisons:            candidate comparisons made by the selector
+      - random_tie_breaks:      random draws spent breaking ties between candidates
+      - threshold_computations: median / quartile thresholds requested by the selector
+      - snapshot_copies:        bin distributions copied into the history
+      - balls, batches
+
+    Phases (seconds): sampling (drawing candidates and coins), selection (choosing among
+    the candidates), commit (adding the batch to the bins), recording (history updates).
+    """
+    COUNTERS = ("balls", "batches", "comparisons", "random_tie_breaks", "threshold_computations", "snapshot_copies")
+    PHASES = ("sampling", "selection", "commit", "recording")
+
+    def __init__(self):
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+
+    def add_batch(self, size: int, start: float, chosen: float, committed: float, end: float) -> None:
+        """
+        Account for one batch from perf_counter timestamps taken before the steps, after the steps,
+        after the commit and after the history update. The selector adds its own share of the
+        steps to "selection"; finish() takes it out of "sampling".
+        """
+        self.counters["balls"] += size
+        self.counters["batches"] += 1
+        self.times["sampling"] += chosen - start
+        self.times["commit"] += committed - chosen
+        self.times["recording"] += end - committed
+
+    def finish(self, snapshot_copies: int) -> None:
+        self.times["sampling"] = max(0.0, self.times["sampling"] - self.times["selection"])
+        self.counters["snapshot_copies"] = snapshot_copies
+
+    def as_dict(self) -> dict:
+        return {"counters": dict(self.counters), "seconds": dict(self.times)}
+
+    def report(self) -> str:
+        counters = ", ".join(f"{name}={value:,}" for name, value in self.counters.items())
+        total = sum(self.times.values()) or 1.0
+        phases = ", ".join(f"{name} {seconds:.3f}s ({seconds / total:.0%})" for name, seconds in self.times.items())
+        return f"{counters}\n  {phases}"
+
+
+class CountingRandom:
+    """Wraps the selector's random source and counts the draws, each of which breaks one tie."""
+    def __init__(self, rng, stats: RunStats):
+        self._rng = rng
+        self._stats = stats
+
+    def random(self) -> float:
+        self._stats.counters["random_tie_breaks"] += 1
+        return self._rng.random()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):  # keeps pickling away from the wrapped source
+            raise AttributeError(name)
+        return getattr(self._rng, name)
+
+
+class CountingThresholds:
+    """Wraps the bins the selector asks for thresholds and counts each median or quartile query."""
+    def __init__(self, bins, stats: RunStats):
+        self._bins = bins
+        self._stats = stats
+
+    def median_load(self):
+        self._stats.counters["threshold_computations"] += 1
+        return self._bins.median_load()
+
+    def quartile_thresholds(self):
+        self._stats.counters["threshold_computations"] += 1
+        return self._bins.quartile_thresholds()
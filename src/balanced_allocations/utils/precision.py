@@ -0,0 +1,69 @@
+import math
+
+from scipy.stats import norm
+from scipy.stats import t as student_t
+
+from balanced_allocations.models.gap_summary import GapAggregator
+
+
+class PrecisionTarget:
+    """
+    Replaces a fixed number of trials: trials keep coming until the confidence interval of the
+    mean gap at n = m and at the final n is at most `half_width` wide on each side, with at
+    least `min_trials` and at most `max_trials` trials.
+    """
+    def __init__(self, half_width: float, min_trials: int = 10, max_trials: int = 1000, confidence: float = 0.95):
+        if half_width <= 0:
+            raise ValueError("half_width must be positive.")
+        if not 2 <= min_trials <= max_trials:
+            raise ValueError("Expected 2 <= min_trials <= max_trials.")
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1.")
+        self.half_width = half_width
+        self.min_trials = min_trials
+        self.max_trials = max_trials
+        self.confidence = confidence
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "PrecisionTarget":
+        """Build a target from the 'precision' block of an experiment in the YAML."""
+        return cls(**cfg)
+
+    def half_widths(self, aggregator: GapAggregator, balls_end: int) -> tuple[float, float]:
+        """Student-t half-widths of the mean gap at n = m and at n = balls_end."""
+        widths = []
+        for n in (aggregator.num_bins, balls_end):
+            count, _, std = aggregator.stats_at(n)
+            if count < 2:
+                widths.append(math.inf)
+                continue
+            quantile = student_t.ppf((1 + self.confidence) / 2, df=count - 1)
+            widths.append(float(quantile * std / math.sqrt(count)))
+        return widths[0], widths[1]
+
+    def zero_spread_trials(self) -> int:
+        """
+        Trials after which identical gaps count as precise (a zero-width interval), within
+        [min_trials, max_trials]. After k identical gaps, a gap one level off can still have
+        probability up to p = -ln(1 - confidence) / k (the rule of three at 95%), which would put
+        about z * sqrt(p / k) on the half-width: within half_width once
+        k >= z * sqrt(-ln(1 - confidence)) / half_width.
+        """
+        z = norm.ppf((1 + self.confidence) / 2)
+        needed = math.ceil(z * math.sqrt(-math.log(1 - self.confidence)) / self.half_width)
+        return min(self.max_trials, max(self.min_trials, needed))
+
+    def done(self, aggregator: GapAggregator, balls_end: int) -> bool:
+        trials = aggregator.trials
+        if trials >= self.max_trials:
+            return True
+        if trials < self.min_trials:
+            return False
+        widths = self.half_widths(aggregator, balls_end)
+        if min(widths) == 0 and trials < self.zero_spread_trials():
+            return False
+        return max(widths) <= self.half_width
+
+    def __repr__(self):
+        return (f"PrecisionTarget(half_width={self.half_width}, min_trials={self.min_trials}, "
+                f"max_trials={self.max_trials}, confidence={self.confidence})")
@@ -0,0 +1,99 @@
+from typing import MutableSequence, Sequence, TypeVar
+
+import numpy as np
+
+from balanced_allocations.utils.alias_table import AliasTable
+
+T = TypeVar("T")
+
+
+class RandomBuffer:
+    """
+    Hands out the draws of a NumPy generator from large pre-generated blocks: uniform bin
+    indices, uniform floats (β coins) and bits (tie-breaks). Refilling a block is one vectorized
+    call, so each draw costs a list lookup instead of a call into the random module.
+
+    With an alias table, bin indices are drawn in proportion to its weights (bin capacities)
+    instead of uniformly, still at the cost of one lookup per draw.
+
+    Also offers the subset of the random.Random interface used by the experiments and BinSelector.
+    """
+    def __init__(self, rng: np.random.Generator, num_bins: int, block_size: int = 1 << 16,
+                 alias: AliasTable | None = None):
+        if block_size <= 0:
+            raise ValueError("block_size must be positive.")
+        self._rng = rng
+        self.num_bins = num_bins
+        self.block_size = block_size
+        self.alias = alias
+        self._indices: list[int] = []
+        self._index_pos = 0
+        self._uniforms: list[float] = []
+        self._uniform_pos = 0
+        self._bits: list[int] = []
+        self._bit_pos = 0
+
+    # --- Buffered draws ---
+    def _draw_indices(self, size: int) -> list[int]:
+        if self.alias is not None:
+            return self.alias.sample(self._rng, size).tolist()
+        return self._rng.integers(self.num_bins, size=size).tolist()
+
+    def index(self) -> int:
+        """Bin index in [0, num_bins): uniform, or weighted by the alias table."""
+        if self._index_pos == len(self._indices):
+            self._indices = self._draw_indices(self.block_size)
+            self._index_pos = 0
+        self._index_pos += 1
+        return self._indices[self._index_pos - 1]
+
+    def take(self, k: int) -> tuple[list[int], int]:
+        """
+        k independent bin indices (as drawn by index()), returned in place as (block, start): they are
+        block[start:start + k]. Avoids building a new list per ball.
+        """
+        if self._index_pos + k > len(self._indices):
+            rest = self._indices[self._index_pos:]
+            self._indices = rest + self._draw_indices(max(self.block_size, k))
+            self._index_pos = 0
+        start = self._index_pos
+        self._index_pos += k
+        return self._indices, start
+
+    def indices(self, k: int) -> list[int]:
+        """k independent bin indices."""
+        block, start = self.take(k)
+        return block[start:start + k]
+
+    def random(self) -> float:
+        """Uniform float in [0, 1)."""
+        if self._uniform_pos == len(self._uniforms):
+            self._uniforms = self._rng.random(self.block_size).tolist()
+            self._uniform_pos = 0
+        self._uniform_pos += 1
+        return self._uniforms[self._uniform_pos - 1]
+
+    def bit(self) -> int:
+        """Fair coin: 0 or 1."""
+        if self._bit_pos == len(self._bits):
+            self._bits = self._rng.integers(2, size=self.block_size).tolist()
+            self._bit_pos = 0
+        self._bit_pos += 1
+        return self._bits[self._bit_pos - 1]
+
+    # --- random.Random compatible helpers ---
+    def randrange(self, n: int) -> int:
+        if n == self.num_bins and self.alias is None:
+            return self.index()
+        return int(self._rng.integers(n))
+
+    def choice(self, seq: Sequence[T]) -> T:
+        if len(seq) == 2:
+            return seq[self.bit()]
+        return seq[int(self.random() * len(seq))]
+
+    def shuffle(self, x: MutableSequence) -> None:
+        """Fisher-Yates shuffle driven by the buffered uniforms."""
+        for i in range(len(x) - 1, 0, -1):
+            j = int(self.random() * (i + 1))
+            x[i], x[j] = x[j], x[i]
@@ -0,0 +1,134 @@
+import bisect
+import copy
+import math
+from pathlib import Path
+
+from balanced_allocations.models.history import EventLogHistory, MemmapHistory, RunHistory, SnapshotHistory
+
+
+class RecordingPolicy:
+    """
+    Decides at which numbers of balls n a run records the bin state.
+
+    Schedules:
+      - "every":    every `every` balls (n = 0, k, 2k, ...)
+      - "log":      about `points` log-spaced values of n
+      - "explicit": the values listed in `at` (ints, or "m" / "m^2")
+
+    n = m and the final n are always recorded, since the gap histograms need them.
+
+    Formats:
+      - "snapshots": copy the distribution at every checkpoint (with `metrics_only`
+                     only the gap is kept, not the full distribution)
+      - "events":    log the bin chosen by every ball and replay it on demand
+      - "memmap":    write every distribution into a preallocated memory-mapped file
+                     `<directory>/<name>.bins` instead of RAM
+    """
+    SCHEDULES = ("every", "log", "explicit")
+    FORMATS = ("snapshots", "events", "memmap")
+
+    def __init__(self, schedule: str = "every", every: int = 1, points: int = 100,
+                 at: list[int | str] | None = None, metrics_only: bool = False, format: str = "snapshots",
+                 directory: str | Path | None = None, name: str = "history"):
+        if schedule not in self.SCHEDULES:
+            raise ValueError(f"Invalid recording schedule '{schedule}'. Expected one of {self.SCHEDULES}.")
+        if format not in self.FORMATS:
+            raise ValueError(f"Invalid recording format '{format}'. Expected one of {self.FORMATS}.")
+        if every <= 0:
+            raise ValueError("every must be positive.")
+        if points <= 0:
+            raise ValueError("points must be positive.")
+        if schedule == "explicit" and not at:
+            raise ValueError("The 'explicit' schedule needs a non-empty 'at' list.")
+        if format == "memmap" and metrics_only:
+            raise ValueError("The 'memmap' format stores the distributions; it cannot be metrics-only.")
+
+        self.schedule = schedule
+        self.every = every
+        self.points = points
+        self.at = list(at) if at else []
+        self.metrics_only = metrics_only
+        self.format = format
+        self.directory = directory
+        self.name = name
+
+    @classmethod
+    def from_config(cls, cfg: dict | None) -> "RecordingPolicy":
+        """Build a policy from the optional 'recording' block of an experiment in the YAML."""
+        if not cfg:
+            return cls()
+        return cls(**cfg)
+
+    def new_history(self, num_bins: int, balls_end: int) -> RunHistory:
+        """Create the empty history a run with `num_bins` bins and `balls_end` balls records into."""
+        if self.format == "events":
+            return EventLogHistory(num_bins, balls_end)
+        if self.format == "memmap":
+            if self.directory is None:
+                raise ValueError("The 'memmap' format needs a 'directory' to write the histories to.")
+            rows = self.checkpoints(num_bins, balls_end).count()
+            return MemmapHistory(Path(self.directory) / f"{self.name}.bins", num_bins, rows, balls_end)
+        return SnapshotHistory(num_bins, self.metrics_only)
+
+    def named(self, name: str) -> "RecordingPolicy":
+        """The same policy writing its memory-mapped history to `<directory>/<name>.bins`."""
+        policy = copy.copy(self)
+        policy.name = name
+        return policy
+
+    def checkpoints(self, num_bins: int, balls_end: int) -> "Checkpoints":
+        """Return the checkpoints of a run with `num_bins` bins and `balls_end` balls."""
+        anchors = {n for n in (0, num_bins, balls_end) if n <= balls_end}
+
+        if self.schedule == "every":
+            return Checkpoints(balls_end, sorted(anchors), step=self.every)
+
+        if self.schedule == "log":
+            ratio = math.log(balls_end) / max(1, self.points - 1) if balls_end > 1 else 0.0
+            values = {round(math.exp(i * ratio)) for i in range(self.points)}
+        else:
+            values = {self._resolve(n, num_bins) for n in self.at}
+
+        values = {n for n in values if 0 <= n <= balls_end}
+        return Checkpoints(balls_end, sorted(values | anchors))
+
+    @staticmethod
+    def _resolve(n: int | str, num_bins: int) -> int:
+        """Resolve an explicit checkpoint, allowing 'm' and 'm^2' as symbolic values."""
+        if isinstance(n, int):
+            return n
+        symbols = {"m": num_bins, "m^2": num_bins ** 2, "m2": num_bins ** 2}
+        if n not in symbols:
+            raise ValueError(f"Invalid checkpoint '{n}'. Expected an int, 'm' or 'm^2'.")
+        return symbols[n]
+
+    def __repr__(self):
+        return (f"RecordingPolicy(schedule={self.schedule!r}, every={self.every}, points={self.points}, "
+                f"at={self.at}, metrics_only={self.metrics_only}, format={self.format!r}, "
+                f"directory={self.directory!r}, name={self.name!r})")
+
+
+class Checkpoints:
+    """Checkpoints of one run: multiples of `step` (if given) plus an explicit sorted list."""
+    def __init__(self, balls_end: int, values: list[int], step: int | None = None):
+        self.balls_end = balls_end
+        self.values = values
+        self.step = step
+
+    def next_after(self, n: int) -> int | None:
+        """Smallest checkpoint strictly greater than n, or None once the run is past the last one."""
+        candidates = []
+        idx = bisect.bisect_right(self.values, n)
+        if idx < len(self.values):
+            candidates.append(self.values[idx])
+        if self.step is not None:
+            multiple = (n // self.step + 1) * self.step
+            if multiple <= self.balls_end:
+                candidates.append(multiple)
+        return min(candidates) if candidates else None
+
+    def count(self) -> int:
+        """Number of checkpoints, an upper bound on the records of a run (batches can skip some)."""
+        if self.step is None:
+            return len(self.values)
+        return self.balls_end // self.step + 1 + sum(1 for n in self.values if n % self.step)
@@ -0,0 +1,25 @@
+import numpy as np
+
+Seed = int | np.random.SeedSequence | None
+
+
+def seed_sequence(seed: Seed) -> np.random.SeedSequence:
+    """SeedSequence for a seed (fresh OS entropy when the seed is None)."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def trial_seeds(root_seed: Seed, trials: int) -> list[np.random.SeedSequence]:
+    """Independent per-trial seeds spawned from a root seed, identical for every worker count."""
+    return seed_sequence(root_seed).spawn(trials)
+
+
+def make_rngs(seed: Seed) -> tuple[np.random.Generator, np.random.Generator, np.random.Generator]:
+    """
+    Independent generators for the scalar (buffered) steps, the vectorized steps and the
+    ball weights, derived from one seed.
+    """
+    # spawn(3) starts with the same two children as spawn(2), so unweighted runs keep their streams
+    scalar, vectorized, weights = seed_sequence(seed).spawn(3)
+    return np.random.default_rng(scalar), np.random.default_rng(vectorized), np.random.default_rng(weights)
@@ -0,0 +1,116 @@
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+from src.balanced_allocations.experiments import ANALYTIC_REGISTRY, EXPERIMENT_REGISTRY
+from src.balanced_allocations.models.gap_summary import GapAggregator
+from src.balanced_allocations.utils.recording import RecordingPolicy
+
+
+# --- Paths ---
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CONFIG = PROJECT_ROOT / "config" / "validation_balanced_allocations.yaml"
+RESULTS_DIR = PROJECT_ROOT / "results" / "balanced_allocations" / "validation"
+
+
+def parse_args():
+    """
+    Parse CLI arguments.
+    """
+    parser = argparse.ArgumentParser(description="Check the analytic models of Balanced Allocations against simulations.")
+    parser.add_argument(
+        "--config", "-c",
+        type=str,
+        default=str(DEFAULT_CONFIG),
+        help="Path to YAML validation config file."
+    )
+    parser.add_argument(
+        "--output", "-o",
+        type=str,
+        help="Where to store the JSON results (default: results/balanced_allocations/validation/<timestamp>.json)."
+    )
+    return parser.parse_args()
+
+
+def load_config(path: str | Path):
+    """
+    Load YAML validation configuration file.
+    Expected format:
+      seed: 0
+      fluid_checks:           # fluid-limit predictions against simulations at n = m^2
+        - experiment: betta_choice
+          num_bins: 1000
+          betta: 0.1
+          trials: 5
+          tolerance: 0.15     # relative
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+
+    if "fluid_checks" not in cfg:
+        raise ValueError("YAML must contain a top-level 'fluid_checks' key.")
+    return cfg
+
+
+def check_key(exp_name: str, params: dict) -> str:
+    return exp_name + "(" + ", ".join(f"{k}={params[k]}" for k in sorted(params)) + ")"
+
+
+def check_fluid_limit(exp_name: str, params: dict, trials: int, tolerance: float, seed: int) -> dict:
+    """
+    Mean simulated gap at n = m^2 over `trials` trials against the fluid-limit prediction.
+    The check fails if the prediction is negative or off by more than `tolerance` (relative).
+    """
+    if exp_name not in ANALYTIC_REGISTRY:
+        raise KeyError(f"Experiment '{exp_name}' has no fluid-limit model.")
+    num_bins = params["num_bins"]
+    recording = RecordingPolicy("explicit", at=["m", "m^2"], metrics_only=True)
+    aggregator = GapAggregator(num_bins)
+    for t in range(trials):
+        aggregator.add_history(EXPERIMENT_REGISTRY[exp_name](**params, seed=seed + t).run(num_bins ** 2, recording))
+    simulated = aggregator.summary().mean[-1]
+    predicted = ANALYTIC_REGISTRY[exp_name].from_params(params).run(num_bins ** 2, recording).mean[-1]
+    return {
+        "key": check_key(exp_name, params),
+        "simulated": simulated,
+        "predicted": predicted,
+        "ok": predicted >= 0 and abs(predicted - simulated) <= tolerance * max(simulated, 1.0),
+    }
+
+
+def main():
+    args = parse_args()
+    config = load_config(args.config)
+    seed = config.get("seed", 0)
+
+    results = {
+        "meta": {"timestamp": datetime.now(timezone.utc).isoformat(), "seed": seed},
+        "fluid_checks": [],
+    }
+
+    for check in config["fluid_checks"]:
+        check = dict(check)
+        exp_name, trials, tolerance = check.pop("experiment"), check.pop("trials", 5), check.pop("tolerance", 0.15)
+        outcome = check_fluid_limit(exp_name, check, trials, tolerance, seed)
+        results["fluid_checks"].append(outcome)
+        print(f"{'ok' if outcome['ok'] else 'MISMATCH':<10} fluid limit of {outcome['key']}: "
+              f"predicted {outcome['predicted']:.2f}, simulated {outcome['simulated']:.2f}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to: {output}")
+
+    mismatches = [check["key"] for check in results["fluid_checks"] if not check["ok"]]
+    if mismatches:
+        print(f"❌ {len(mismatches)} fluid-limit mismatch(es)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from pathlib import Path
 from typing import Iterable
 
 
@@ -9,4 +10,9 @@ class DataStreamSource(ABC):
 
     @abstractmethod
     def __len__(self) -> int:
-        pass
\ No newline at end of file
+        pass
+
+    @property
+    def path(self) -> Path | None:
+        """File the stream is read from, if any."""
+        return None
\ No newline at end of file
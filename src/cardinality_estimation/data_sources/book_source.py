@@ -15,6 +15,10 @@ class BookSource(DataStreamSource):
             for line in f:
                 yield line.strip()
 
+    @property
+    def path(self):
+        return self.book_path
+
     def __len__(self):
         """
         Number of elements in the data stream (lines in the book).
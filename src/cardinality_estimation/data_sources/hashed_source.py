@@ -0,0 +1,81 @@
+import hashlib
+import os
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from .base import DataStreamSource
+
+
+CACHE_FOLDER = Path(__file__).parents[3] / 'data' / 'hashes'
+
+class HashedSource(DataStreamSource):
+    """
+    A data source together with the base hashes of its elements, cached as a uint32 .npy file.
+
+    The estimators' hash functions are seeded affine maps of one base hash, the CRC32 of the
+    element: h(x) = (a * crc32(x) + b) mod 2^32. The base hashes do not depend on the seed, so one
+    cached array serves every repetition, each applying its own (a, b) to the whole array.
+    The cache is keyed by the content of the source, so a regenerated file gets a new one.
+
+    Iterating still yields the elements themselves (for the exact count).
+    """
+    BASE_HASH = 'crc32'
+
+    def __init__(self, source: DataStreamSource, cache_folder: Path = CACHE_FOLDER):
+        self.source = source
+        self.cache_folder = Path(cache_folder)
+        self._base_hashes = None  # cache
+
+    def __iter__(self):
+        return iter(self.source)
+
+    def __len__(self):
+        return len(self.base_hashes)
+
+    @property
+    def path(self):
+        return self.source.path
+
+    @property
+    def base_hashes(self) -> np.ndarray:
+        """
+        CRC32 of every element, in stream order.
+        Loaded from (or written to) the cache on first use and kept in memory.
+        """
+        if self._base_hashes is None:
+            cache_path = self.cache_path()
+            if not cache_path.exists():
+                self._write_cache(cache_path)
+            self._base_hashes = np.load(cache_path)
+        return self._base_hashes
+
+    def cache_path(self) -> Path:
+        digest = hashlib.sha256()
+        if self.path is not None:
+            with self.path.open('rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            name = f'{self.path.parent.name}-{self.path.stem}'
+        else:
+            for element in self.source:
+                digest.update(element.encode('utf-8') + b'\n')
+            name = type(self.source).__name__
+        return self.cache_folder / f'{name}-{digest.hexdigest()[:16]}-{self.BASE_HASH}.npy'
+
+    def _write_cache(self, cache_path: Path) -> None:
+        hashes = np.fromiter((zlib.crc32(element.encode('utf-8')) for element in self.source), dtype=np.uint32)
+
+        # Caches of earlier contents of the same file are stale
+        self.cache_folder.mkdir(parents=True, exist_ok=True)
+        prefix = cache_path.name.rsplit('-', 2)[0]
+        for stale in self.cache_folder.glob(f'*-{self.BASE_HASH}.npy'):
+            if stale.name.rsplit('-', 2)[0] == prefix:
+                stale.unlink()
+
+        # Written under a temporary name first, so an interrupted run leaves no partial cache
+        tmp_path = cache_path.with_suffix('.tmp')
+        with tmp_path.open('wb') as f:
+            np.save(f, hashes)
+        os.replace(tmp_path, cache_path)
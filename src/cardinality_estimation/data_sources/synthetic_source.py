@@ -62,6 +62,10 @@ class Synthetic_source(DataStreamSource):
             for line in f:
                 yield line.strip()
 
+    @property
+    def path(self):
+        return self.output_path
+
     def __len__(self):
         """
         Number of elements in the data stream (lines in the book).
@@ -2,6 +2,7 @@ from .hll import HyperLogLog
 from .rec import Recordinality
 from .true_cardinality import TrueCardinalityCounter
 from .pcsa import PCSA
+from .hashing import HASH_FAMILY_REGISTRY, HashFamily, RandomHash, VectorizedHash, repetition_seeds
 
 ESTIMATOR_REGISTRY = {
     "hll": HyperLogLog,
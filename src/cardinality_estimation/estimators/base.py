@@ -1,9 +1,12 @@
 from enum import Enum, auto
 from abc import ABC, abstractmethod
+from itertools import islice
 
-import randomhash
+import numpy as np
 
 from cardinality_estimation.data_sources.base import DataStreamSource
+from cardinality_estimation.data_sources.hashed_source import HashedSource
+from .hashing import AffineCRC32Hash, HashFamily, RandomHash
 
 
 class CardinalityEstimatorType(Enum):
@@ -16,22 +19,6 @@ class CardinalityEstimatorType(Enum):
 class CardinalityEstimator(ABC):
     INT_SIZE = 32
 
-    def __init__(self):
-        self.rfh = randomhash.RandomHashFamily(count=1)  # single hash function
-
-    def _hash(self, value: str) -> int:
-        """32-bit hash using RandomHashFamily."""
-        return self.rfh.hash(value)
-
-    @staticmethod
-    def _rho(w: int, max_bits: int) -> int:
-        """
-        Counts the number of leading zeros in w, plus one.
-        """
-        if w == 0:
-            return max_bits + 1
-        return max_bits - w.bit_length() + 1
-
     @abstractmethod
     def add(self, element: str) -> None:
         """Process a new element from the data"""
@@ -53,3 +40,57 @@ class CardinalityEstimator(ABC):
         in bytes (algorithmic storage only).
         """
         pass
+
+
+class HashingEstimator(CardinalityEstimator):
+    """An estimator that only sees the hashes of the elements, so it can also consume them directly."""
+    CHUNK_SIZE = 65536  # elements hashed at once when reading a source
+
+    def __init__(self, hash_family: HashFamily | None = None):
+        # single hash function; by default a fresh one from RandomHashFamily
+        self.hash_family = hash_family or RandomHash()
+
+    def _hash(self, value: str) -> int:
+        """32-bit hash using the estimator's hash family."""
+        return self.hash_family.hash(value)
+
+    @staticmethod
+    def _rho(w: int, max_bits: int) -> int:
+        """
+        Counts the number of leading zeros in w, plus one.
+        """
+        if w == 0:
+            return max_bits + 1
+        return max_bits - w.bit_length() + 1
+
+    @property
+    def needs_elements(self) -> bool:
+        """Whether the estimator keeps elements too, so that hashes alone do not suffice."""
+        return False
+
+    def add(self, element: str) -> None:
+        self.add_hash(self._hash(element))
+
+    @abstractmethod
+    def add_hash(self, h: int) -> None:
+        """Process the hash of a new element"""
+        pass
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """Process the hashes of many elements, in order"""
+        for h in hashes.tolist():
+            self.add_hash(h)
+
+    def add_elements(self, elements: list[str]) -> None:
+        """Process a chunk of elements, hashed all at once"""
+        self.add_hashes(self.hash_family.hash_many(elements))
+
+    def add_source(self, source: DataStreamSource) -> None:
+        if (isinstance(source, HashedSource) and isinstance(self.hash_family, AffineCRC32Hash)
+                and not self.needs_elements):
+            # No text to read or hash: the cached CRC32s only need this estimator's seed
+            self.add_hashes(self.hash_family.from_crc32(source.base_hashes))
+            return
+        elements = iter(source)
+        while chunk := list(islice(elements, self.CHUNK_SIZE)):
+            self.add_elements(chunk)
@@ -0,0 +1,123 @@
+import random
+import zlib
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+import numpy as np
+import randomhash
+
+
+class HashFamily(ABC):
+    """
+    One 32-bit hash function on strings, drawn from a seeded family:
+    the same seed gives the same function, and seed=None a fresh random one.
+    """
+    def __init__(self, seed: int | None = None):
+        self.seed = seed
+
+    @abstractmethod
+    def hash(self, value: str) -> int:
+        pass
+
+    def hash_many(self, values: Sequence[str]) -> np.ndarray:
+        """Hashes of a whole chunk of values, as a uint32 array."""
+        return np.fromiter(map(self.hash, values), dtype=np.uint32, count=len(values))
+
+
+class AffineCRC32Hash(HashFamily):
+    """
+    The family of randomhash: h(x) = (a * crc32(x) + b) mod 2^32, with a odd and b drawn from
+    random.Random(seed). Since h only depends on x through its CRC32, streams whose CRC32s are
+    cached (see HashedSource) are hashed with from_crc32 alone.
+    """
+    def __init__(self, seed: int | None = None):
+        super().__init__(seed)
+        prng = random.Random(seed)
+        # Drawn in the order of randomhash, so a seed gives the same function as there
+        self.a = 2 * prng.getrandbits(32) + 1
+        self.b = prng.getrandbits(32)
+
+    def hash(self, value: str) -> int:
+        return (self.a * zlib.crc32(value.encode('utf-8')) + self.b) & 0xFFFFFFFF
+
+    def from_crc32(self, crcs: np.ndarray) -> np.ndarray:
+        """Hashes of the values with the given CRC32s, as a uint32 array."""
+        # a * x + b only overflows 64 bits above bit 32, which the mask drops anyway
+        a = np.uint64(self.a % 2 ** 64)
+        return ((crcs.astype(np.uint64) * a + np.uint64(self.b)) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+class RandomHash(AffineCRC32Hash):
+    """randomhash's RandomHashFamily itself, one value at a time (the reference implementation)."""
+    def __init__(self, seed: int | None = None):
+        self.rfh = randomhash.RandomHashFamily(count=1, seed=seed)
+        self.seed = seed
+        self.a = self.rfh._tbl_coprime[0]
+        self.b = self.rfh._tbl_noise[0]
+
+    def hash(self, value: str) -> int:
+        return self.rfh.hash(value)
+
+
+class VectorizedHash(AffineCRC32Hash):
+    """
+    The same functions as RandomHash, with hash_many computing the CRC32s of a whole chunk in
+    NumPy: the values are laid out as rows of a byte matrix, longest first, and the table-driven
+    CRC advances one byte column at a time over the rows that are still that long.
+    """
+    _TABLE = None
+
+    @classmethod
+    def _crc_table(cls) -> np.ndarray:
+        if cls._TABLE is None:
+            table = np.arange(256, dtype=np.uint32)
+            for _ in range(8):
+                table = np.where(table & 1, (table >> 1) ^ np.uint32(0xEDB88320), table >> 1)
+            cls._TABLE = table.astype(np.uint32)
+        return cls._TABLE
+
+    def hash_many(self, values: Sequence[str]) -> np.ndarray:
+        return self.from_crc32(self.crc32_many(values))
+
+    @classmethod
+    def crc32_many(cls, values: Sequence[str]) -> np.ndarray:
+        """zlib.crc32 of every value (UTF-8 encoded), as a uint32 array."""
+        table = cls._crc_table()
+        encoded = [value.encode('utf-8') for value in values]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        order = np.argsort(-lengths, kind='stable')
+        lengths = lengths[order]
+        width = int(lengths[0]) if len(lengths) else 0
+
+        data = np.frombuffer(b''.join(encoded[i] for i in order.tolist()), dtype=np.uint8)
+        matrix = np.zeros((len(encoded), width), dtype=np.uint8)
+        matrix[np.arange(width) < lengths[:, None]] = data
+
+        # Rows are sorted by decreasing length, so the rows still active at a column are a prefix
+        active = np.searchsorted(-lengths, -np.arange(width), side='left')
+        crc = np.full(len(encoded), 0xFFFFFFFF, dtype=np.uint32)
+        for column in range(width):
+            rows = active[column]
+            c = crc[:rows]
+            crc[:rows] = table[(c ^ matrix[:rows, column]) & 0xFF] ^ (c >> 8)
+        crc ^= np.uint32(0xFFFFFFFF)
+
+        crcs = np.empty_like(crc)
+        crcs[order] = crc
+        return crcs
+
+
+HASH_FAMILY_REGISTRY = {
+    "randomhash": RandomHash,
+    "vectorized": VectorizedHash,
+}
+
+
+def repetition_seeds(seed: int | None, repetitions: int) -> list[int | None]:
+    """
+    Hash seed of every repetition: independent seeds derived from one root seed,
+    or None for all (a fresh random function per estimator) without one.
+    """
+    if seed is None:
+        return [None] * repetitions
+    return [int(child.generate_state(1, np.uint64)[0]) for child in np.random.SeedSequence(seed).spawn(repetitions)]
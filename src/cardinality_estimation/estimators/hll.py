@@ -1,28 +1,26 @@
 import numpy as np
-import randomhash
-from .base import CardinalityEstimator
+from .base import HashingEstimator
+from .hashing import HashFamily
 
-class HyperLogLog(CardinalityEstimator):
+class HyperLogLog(HashingEstimator):
     """
    HyperLogLog cardinality estimator.
 
    Estimates the number of distinct elements using fixed memory
    with probabilistic guarantees.
    """
-    def __init__(self, p: int = 1):
+    def __init__(self, p: int = 1, hash_family: HashFamily | None = None):
         """
        :param p: Number of bits used for register indexing.
                  Number of registers m = 2^p.
-       :param hash_count: Number of hash functions in the hash family.
+       :param hash_family: Hash function of the estimator (default: a fresh RandomHash).
        """
-        super().__init__()
+        super().__init__(hash_family)
         self.p = p
         self.m = 2 ** p
         self.registers = [0] * self.m
 
-    def add(self, element: str) -> None:
-        h = self._hash(element)
-
+    def add_hash(self, h: int) -> None:
         # first p bits → register index
         idx = h >> (self.INT_SIZE - self.p)
 
@@ -32,6 +30,17 @@ class HyperLogLog(CardinalityEstimator):
         rho = self._rho(w, self.INT_SIZE - self.p)
         self.registers[idx] = max(self.registers[idx], rho)
 
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        bits = self.INT_SIZE - self.p
+        idx = hashes >> bits
+        w = hashes & ((1 << bits) - 1)
+
+        # frexp gives the bit length of w exactly (0 for w = 0, i.e. rho = bits + 1)
+        rho = bits - np.frexp(w.astype(np.float64))[1] + 1
+        registers = np.array(self.registers)
+        np.maximum.at(registers, idx, rho)
+        self.registers = registers.tolist()
+
     def estimate(self):
         Z = sum(2.0 ** -v for v in self.registers)
         E = 0.7213 / (1 + 1.079 / self.m) * self.m ** 2 / Z
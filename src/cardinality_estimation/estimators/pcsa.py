@@ -1,22 +1,36 @@
 import math
-from .base import CardinalityEstimator
 
+import numpy as np
 
-class PCSA(CardinalityEstimator):
-    def __init__(self, m=64):
-        super().__init__()
+from .base import HashingEstimator
+from .hashing import HashFamily
+
+
+class PCSA(HashingEstimator):
+    def __init__(self, m=64, hash_family: HashFamily | None = None):
+        super().__init__(hash_family)
         self.m = m
         self.max_bits = self.INT_SIZE
         self.bitmaps = [[0] * self.max_bits for _ in range(m)]
 
-    def add(self, element: str):
-        h = self._hash(element)
+    def add_hash(self, h: int):
         j = h % self.m
         w = h >> int(math.log2(self.m))
         rho = self._rho(w, int(self.INT_SIZE - math.log2(self.m))) - 1
         if rho < self.max_bits:
             self.bitmaps[j][rho] = 1
 
+    def add_hashes(self, hashes: np.ndarray):
+        shift = int(math.log2(self.m))
+        j = hashes % self.m
+        w = hashes >> shift
+        # frexp gives the bit length of w exactly
+        rho = int(self.INT_SIZE - math.log2(self.m)) - np.frexp(w.astype(np.float64))[1]
+        keep = rho < self.max_bits
+        bitmaps = np.array(self.bitmaps)
+        bitmaps[j[keep], rho[keep]] = 1
+        self.bitmaps = bitmaps.tolist()
+
     def estimate(self):
         PHI = 0.77351
         R = []
@@ -7,7 +7,8 @@ import math
 
 from cskipdict import SkipDict
 
-from .base import CardinalityEstimator
+from .base import HashingEstimator
+from .hashing import HashFamily
 
 
 class Element(object):
@@ -17,16 +18,31 @@ class Element(object):
         self.value = value
         self.count = 1
 
-class Recordinality(CardinalityEstimator):
-    def __init__(self, size = 1, hash_key=None, store_values=True):
-        super().__init__()
+class Recordinality(HashingEstimator):
+    def __init__(self, size = 1, hash_key=None, store_values=True, hash_family: HashFamily | None = None):
+        super().__init__(hash_family)
         self.k_records = SkipDict()
         self.size = size
         self.modifications = 0
         self.store_values = store_values
 
     def add(self, value):
-        hash = self._hash(value)
+        self._add(self._hash(value), value)
+
+    @property
+    def needs_elements(self):
+        return self.store_values
+
+    def add_hash(self, h):
+        if self.store_values:
+            raise ValueError("Recordinality with store_values needs the elements, not only their hashes.")
+        self._add(h, None)
+
+    def add_elements(self, elements):
+        for hash, value in zip(self.hash_family.hash_many(elements).tolist(), elements):
+            self._add(hash, value)
+
+    def _add(self, hash, value):
         if hash in self.k_records:
             element = self.k_records[hash]
             if self.store_values and element.value == value:
@@ -3,7 +3,6 @@ from .base import CardinalityEstimator
 class TrueCardinalityCounter(CardinalityEstimator):
 
     def __init__(self):
-        super().__init__()
         self._elements = set()
 
     def add(self, value):
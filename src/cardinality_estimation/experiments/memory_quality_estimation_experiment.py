@@ -4,11 +4,12 @@ import numpy as np
 from matplotlib import pyplot as plt
 
 from cardinality_estimation.data_sources.book_source import BookSource
+from cardinality_estimation.data_sources.hashed_source import HashedSource
 from cardinality_estimation.data_sources.synthetic_source import Synthetic_source
 from cardinality_estimation.estimators.base import CardinalityEstimatorType
 from cardinality_estimation.experiments.base import CardinalityEstimationExperiment
 from cardinality_estimation.estimators import ESTIMATOR_REGISTRY, TrueCardinalityCounter, HyperLogLog, Recordinality, \
-    PCSA
+    PCSA, HASH_FAMILY_REGISTRY, repetition_seeds
 
 
 @dataclass
@@ -18,7 +19,7 @@ class MemoryQualityItem:
 
 class MemoryQualityEstimationExperiment(CardinalityEstimationExperiment):
 
-    def __init__(self, estimator_types: list[CardinalityEstimatorType], minimum_quality_factor: float = 0.95, repetitions: int = 25, book_name: str = None, n: int = 50, N: int = 100, alpha: float = 1.0, output_file: str = None):
+    def __init__(self, estimator_types: list[CardinalityEstimatorType], minimum_quality_factor: float = 0.95, repetitions: int = 25, book_name: str = None, n: int = 50, N: int = 100, alpha: float = 1.0, output_file: str = None, hash_family: str = "randomhash", seed: int = None):
         self.estimator_types = estimator_types
         self.estimator_classes = [
             ESTIMATOR_REGISTRY[estimator_type.value]
@@ -26,11 +27,16 @@ class MemoryQualityEstimationExperiment(CardinalityEstimationExperiment):
         ]
         self.minimum_quality_factor = minimum_quality_factor
         self.repetitions = repetitions
+        # Every repetition gets its own hash function, from the seed when one is given
+        self.hash_family = HASH_FAMILY_REGISTRY[hash_family]
+        self.hash_seeds = repetition_seeds(seed, repetitions)
 
         if book_name:
-            self.data_source = BookSource(book_name)
+            source = BookSource(book_name)
         else:
-            self.data_source = Synthetic_source(n, N, alpha, output_file)
+            source = Synthetic_source(n, N, alpha, output_file)
+        # Repetitions read the cached hashes of the stream instead of its text
+        self.data_source = HashedSource(source)
 
         self.results: dict[CardinalityEstimatorType, list[list[MemoryQualityItem]]] = {}
 
@@ -117,14 +123,15 @@ class MemoryQualityEstimationExperiment(CardinalityEstimationExperiment):
         if est_class is HyperLogLog:
             estimator_args = {"p": step + 1}
         elif est_class is Recordinality:
-            estimator_args = {"size": 2 ** (step - 1)}
+            # Only the estimate is used: without sampled values the cached hashes suffice
+            estimator_args = {"size": 2 ** (step - 1), "store_values": False}
         elif est_class is PCSA:
             estimator_args = {"m": 2 ** (step - 1)}
         else:
             raise ValueError(f"Unknown estimator type {est_class}")
 
-        for _ in range(self.repetitions):
-            estimator = est_class(**estimator_args)
+        for hash_seed in self.hash_seeds:
+            estimator = est_class(**estimator_args, hash_family=self.hash_family(hash_seed))
             estimator.add_source(self.data_source)
             step_results.append(
                 MemoryQualityItem(
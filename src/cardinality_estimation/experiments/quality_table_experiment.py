@@ -1,7 +1,9 @@
 import numpy as np
 from cardinality_estimation.data_sources.book_source import BookSource
+from cardinality_estimation.data_sources.hashed_source import HashedSource
 from cardinality_estimation.data_sources.synthetic_source import Synthetic_source
-from cardinality_estimation.estimators import ESTIMATOR_REGISTRY, TrueCardinalityCounter
+from cardinality_estimation.estimators import (ESTIMATOR_REGISTRY, HASH_FAMILY_REGISTRY, TrueCardinalityCounter,
+                                               repetition_seeds)
 from cardinality_estimation.estimators.base import CardinalityEstimatorType
 from cardinality_estimation.experiments.base import CardinalityEstimationExperiment
 import math
@@ -18,7 +20,9 @@ class QualityTableExperiment(CardinalityEstimationExperiment):
         n: int = 50, 
         N: int = 100, 
         alpha: float = 1.0,
-        output_file: str = None
+        output_file: str = None,
+        hash_family: str = "randomhash",
+        seed: int = None
     ):
         self.estimator_types = estimator_types
         self.estimator_classes = [
@@ -27,11 +31,16 @@ class QualityTableExperiment(CardinalityEstimationExperiment):
         ]
         self.memory_bytes = memory_bytes
         self.repetitions = repetitions
+        # Every repetition gets its own hash function, from the seed when one is given
+        self.hash_family = HASH_FAMILY_REGISTRY[hash_family]
+        self.hash_seeds = repetition_seeds(seed, repetitions)
 
         if book_name:
-            self.data_source = BookSource(book_name)
+            source = BookSource(book_name)
         else:
-            self.data_source = Synthetic_source(n, N, alpha, output_file)
+            source = Synthetic_source(n, N, alpha, output_file)
+        # Repetitions read the cached hashes of the stream instead of its text
+        self.data_source = HashedSource(source)
 
         self.results: dict[CardinalityEstimatorType, dict[str, float]] = {}
 
@@ -59,7 +68,8 @@ class QualityTableExperiment(CardinalityEstimationExperiment):
         elif est_class.__name__ == "Recordinality":
             # Each record ~ 4 bytes (hash + counter)
             size = max(1, B // 4)
-            return {"size": size}
+            # Only the estimate is used: without sampled values the cached hashes suffice
+            return {"size": size, "store_values": False}
 
         elif est_class.__name__ == "PCSA":
             # Each bitmap register ~ 4 bytes
@@ -80,8 +90,8 @@ class QualityTableExperiment(CardinalityEstimationExperiment):
             # Get parameters based on source length
             estimator_args = self._get_estimator_args(est_class)
 
-            for _ in range(self.repetitions):
-                estimator = est_class(**estimator_args)
+            for hash_seed in self.hash_seeds:
+                estimator = est_class(**estimator_args, hash_family=self.hash_family(hash_seed))
                 estimator.add_source(self.data_source)
                 est_val = estimator.estimate()
                 estimates.append(est_val)